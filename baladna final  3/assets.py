@@ -0,0 +1,199 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from flask import request, url_for
+from markupsafe import Markup, escape
+
+# Images under SOURCE_FOLDER are built into BUILD_FOLDER (both inside static/)
+SOURCE_FOLDER = 'images'
+BUILD_FOLDER = 'build'
+MANIFEST_NAME = 'manifest.json'
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# Widths generated for each image (never wider than the source)
+VARIANT_WIDTHS = (64, 128, 256, 512, 1024, 1920)
+
+# Output formats, best first, with their Pillow save options
+VARIANT_FORMATS = {
+    # speed 8 encodes ~3x faster than the default for a few percent larger files
+    'avif': {'format': 'AVIF', 'quality': 55, 'speed': 8},
+    'webp': {'format': 'WEBP', 'quality': 78},
+}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+# Built files never change under a given name
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _write(static_folder, relative_name, data):
+    path = os.path.join(static_folder, relative_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+# Encode one resized copy of an image; None if Pillow lacks the format
+def _encode(image, fmt):
+    from PIL import features
+
+    if fmt == 'avif' and not features.check('avif'):
+        return None
+    output = io.BytesIO()
+    image.save(output, **VARIANT_FORMATS[fmt])
+    return output.getvalue()
+
+
+# Build fingerprinted copies of every image in static/images: the original
+# plus resized AVIF and WebP variants. Writes static/build/manifest.json and
+# returns it. The previous build is replaced as a whole.
+def build_assets(static_folder, widths=VARIANT_WIDTHS):
+    from PIL import Image, ImageOps
+
+    source_folder = os.path.join(static_folder, SOURCE_FOLDER)
+    staging = tempfile.mkdtemp(prefix='build-', dir=static_folder)
+    manifest = {}
+    try:
+        for name in sorted(os.listdir(source_folder)):
+            stem, extension = os.path.splitext(name)
+            if extension.lower() not in IMAGE_EXTENSIONS:
+                continue
+            logical_name = f"{SOURCE_FOLDER}/{name}"
+            source_path = os.path.join(source_folder, name)
+            with open(source_path, 'rb') as f:
+                original = f.read()
+
+            slug = stem.replace(' ', '-').lower()
+            original_name = f"{SOURCE_FOLDER}/{slug}.{_fingerprint(original)}{extension.lower()}"
+            _write(staging, original_name, original)
+
+            with Image.open(source_path) as source:
+                image = ImageOps.exif_transpose(source)
+                image.load()
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+            entry = {
+                'width': image.width,
+                'height': image.height,
+                'original': f"{BUILD_FOLDER}/{original_name}",
+                'variants': {},
+            }
+            sizes = sorted({min(width, image.width) for width in widths})
+            for fmt in VARIANT_FORMATS:
+                variants = {}
+                for width in sizes:
+                    height = round(image.height * width / image.width)
+                    resized = image if width == image.width else image.resize(
+                        (width, height), Image.LANCZOS)
+                    data = _encode(resized, fmt)
+                    if data is None:
+                        break
+                    variant_name = f"{SOURCE_FOLDER}/{slug}-{width}.{_fingerprint(data)}.{fmt}"
+                    _write(staging, variant_name, data)
+                    variants[str(width)] = {'path': f"{BUILD_FOLDER}/{variant_name}",
+                                            'bytes': len(data)}
+                if variants:
+                    entry['variants'][fmt] = variants
+            entry['bytes'] = len(original)
+            manifest[logical_name] = entry
+
+        with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+        build_folder = os.path.join(static_folder, BUILD_FOLDER)
+        if os.path.exists(build_folder):
+            shutil.rmtree(build_folder)
+        os.replace(staging, build_folder)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+# static/build/manifest.json, reloaded when a new build replaces it
+class AssetManifest:
+    def __init__(self, static_folder):
+        self.path = os.path.join(static_folder, BUILD_FOLDER, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._mtime = None
+
+    def get(self, name):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+                self._mtime = mtime
+            return self._entries.get(name)
+
+
+def _static_url(path):
+    return url_for('static', filename=path)
+
+
+# Template helpers. Without a build (e.g. in development) they fall back to
+# the untouched file under static/.
+def init_app(app):
+    manifest = AssetManifest(app.static_folder)
+    app.extensions['asset_manifest'] = manifest
+
+    def best_variants(entry, fmt=None):
+        variants = entry['variants']
+        if fmt:
+            return variants.get(fmt)
+        return next(iter(variants.values()), None)
+
+    # URL of an image, in fmt ('avif', 'webp') and at least width pixels wide
+    # if built, otherwise the fingerprinted or plain original
+    def asset_url(name, fmt=None, width=None):
+        entry = manifest.get(name)
+        if entry is None:
+            return _static_url(name)
+        variants = best_variants(entry, fmt) if fmt or width else None
+        if not variants:
+            return _static_url(entry['original'])
+        widths = sorted(variants, key=int)
+        chosen = next((w for w in widths if width and int(w) >= width), widths[-1])
+        return _static_url(variants[chosen]['path'])
+
+    # <picture> with AVIF and WebP srcsets and the original as fallback
+    def asset_picture(name, alt='', sizes='100vw', **attributes):
+        attributes = ''.join(f' {key.replace("_", "-")}="{escape(value)}"'
+                             for key, value in attributes.items())
+        entry = manifest.get(name)
+        if entry is None:
+            return Markup(f'<img src="{escape(_static_url(name))}" alt="{escape(alt)}"{attributes}>')
+
+        sources = []
+        for fmt, variants in entry['variants'].items():
+            srcset = ', '.join(f"{_static_url(variant['path'])} {width}w"
+                               for width, variant in sorted(variants.items(), key=lambda v: int(v[0])))
+            sources.append(f'<source type="{MIME_TYPES[fmt]}" srcset="{escape(srcset)}" '
+                           f'sizes="{escape(sizes)}">')
+        return Markup(f'<picture>{"".join(sources)}<img src="{escape(_static_url(entry["original"]))}" '
+                      f'alt="{escape(alt)}" width="{entry["width"]}" height="{entry["height"]}"'
+                      f'{attributes}></picture>')
+
+    app.jinja_env.globals.update(asset_url=asset_url, asset_picture=asset_picture)
+
+    # Fingerprinted files can be cached forever
+    @app.after_request
+    def cache_built_assets(response):
+        if (request.endpoint == 'static' and response.status_code == 200 and
+                request.view_args.get('filename', '').startswith(f"{BUILD_FOLDER}/")):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
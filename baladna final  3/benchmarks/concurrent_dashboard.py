@@ -0,0 +1,101 @@
+"""Hammer admin_dashboard employee updates from many threads against a SQLite file.
+
+Each thread owns its own employees, so the salary it wrote last must be the
+one in the database at the end; the writes still contend for the database.
+Exits non-zero if any update fails (e.g. "database is locked") or is lost.
+Run from the application folder:
+
+    python benchmarks/concurrent_dashboard.py --threads 16 --updates 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--updates', type=int, default=50, help='Updates per thread.')
+    parser.add_argument('--employees-per-thread', type=int, default=2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='baladna-concurrency-')
+    sys.path.insert(0, APP_DIR)
+    os.chdir(APP_DIR)
+
+    from app import create_app
+    from models import db, Employee
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'employees.db')}",
+        'FRAGMENT_CACHE_PATH': os.path.join(workdir, 'fragments.db'),
+        'SESSION_PATH': os.path.join(workdir, 'sessions.db'),
+        'SEARCH_INDEX_PATH': os.path.join(workdir, 'search.db'),
+        'JOB_RESULTS_FOLDER': os.path.join(workdir, 'job_results'),
+        # Jobs queued by the routes are not worked during the timing
+        'JOB_WORKERS_IN_PROCESS': False,
+    })
+
+    with app.app_context():
+        db.create_all()
+        for i in range(args.threads * args.employees_per_thread):
+            db.session.add(Employee(name=f"Employee {i}", monthly_salary=1000, id_number=f"9{i:08d}",
+                                    start_date=date(2024, 1, 1), holidays_taken=0))
+        db.session.commit()
+        print(f"journal_mode: {db.session.execute(db.text('PRAGMA journal_mode')).scalar()}")
+
+    failures = []
+    # employee id -> salary its thread wrote last
+    expected = {}
+    barrier = threading.Barrier(args.threads)
+
+    def worker(number):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['admin'] = {'username': 'benchmark'}
+        barrier.wait()
+        for update in range(args.updates):
+            employee_id = number * args.employees_per_thread + update % args.employees_per_thread + 1
+            salary = 1000 + number * args.updates + update
+            response = client.post('/admin_dashboard', data={
+                'update_employee': '1',
+                'employee_id': str(employee_id),
+                'new_salary': str(salary),
+            })
+            if response.status_code != 302:
+                failures.append((number, update, response.status_code))
+            else:
+                expected[employee_id] = salary
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = args.threads * args.updates
+    print(f"{total} updates from {args.threads} threads in {elapsed:.2f}s "
+          f"({total / elapsed:.1f} updates/sec), {len(failures)} failed")
+
+    with app.app_context():
+        salaries = dict(db.session.query(Employee.id, Employee.monthly_salary))
+    lost = {employee_id: (salary, salaries.get(employee_id))
+            for employee_id, salary in expected.items() if salaries.get(employee_id) != salary}
+    if lost:
+        print(f"{len(lost)} employees lost their last update (expected, found): "
+              f"{list(lost.items())[:5]}")
+    if failures or lost:
+        print(f"FAILED: {failures[:5]}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Measure login latency for candidate PASSWORD_HASH_METHOD settings.
+
+Each login costs one check_password_hash call, so the time below is what
+the KDF adds to every login. Run from the application folder:
+
+    python benchmarks/password_hashing.py
+"""
+import argparse
+import time
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+METHODS = (
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+    'scrypt:65536:8:1',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('methods', nargs='*', default=METHODS)
+    args = parser.parse_args()
+
+    print(f"{'method':<24} {'login (ms)':>10}")
+    for method in args.methods:
+        password_hash = generate_password_hash('benchmark-password', method=method)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            check_password_hash(password_hash, 'benchmark-password')
+            timings.append(time.perf_counter() - started)
+        print(f"{method:<24} {min(timings) * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
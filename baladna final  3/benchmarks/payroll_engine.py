@@ -0,0 +1,135 @@
+"""Time the vectorized payroll engine against the per-employee Python loop.
+
+Also checks the engine's integer-cent results against an independent Decimal
+calculation for a random sample of employees and exits non-zero on any
+difference, so a change to the rounding cannot slip through.
+
+Run from the application folder:
+
+    python benchmarks/payroll_engine.py --employees 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import payroll_engine  # noqa: E402
+
+
+def synthetic_inputs(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'employee_id': np.arange(1, size + 1),
+        'monthly_salary': rng.integers(2500, 25000, size).astype(np.float64),
+        'days_absent': rng.integers(0, 3, size),
+        'hours_absent': rng.integers(0, 9, size),
+        'extra_days': rng.integers(0, 3, size),
+        'extra_hours': rng.integers(0, 20, size),
+        'extra_hours_1_5': rng.integers(0, 20, size),
+        'advanced_payment': rng.integers(0, 2000, size).astype(np.float64),
+    }
+
+
+# The per-employee calculation the routes used before the engine existed
+def python_loop(inputs, year, month):
+    number_of_days = payroll_engine.monthrange(year, month)[1]
+    columns = [inputs[name].tolist() for name in payroll_engine.INPUT_COLUMNS[1:]]
+    net = []
+    for salary, days_absent, hours_absent, extra_days, extra_hours, extra_hours_1_5, advance in zip(*columns):
+        salary_per_day = round(salary / number_of_days, 2)
+        salary_per_hour = round(salary_per_day / 9, 2)
+        extra_shifts_earnings = round(extra_hours_1_5 * salary_per_hour * 1.5, 2)
+        net.append(round(salary - advance - days_absent * salary_per_day -
+                         hours_absent * salary_per_hour + extra_days * salary_per_day +
+                         extra_hours * salary_per_hour + extra_shifts_earnings, 2))
+    return net
+
+
+# The payroll rules written out once more with Decimal, one employee at a
+# time, for checking the engine
+def decimal_reference(salary, days_absent, hours_absent, extra_days, extra_hours,
+                      extra_hours_1_5, advance, number_of_days):
+    def money(value):
+        return Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    salary = money(repr(salary))
+    advance = money(repr(advance))
+    per_day = money(salary / number_of_days)
+    per_hour = money(per_day / payroll_engine.HOURS_PER_DAY)
+    overtime_1_5 = money(extra_hours_1_5 * per_hour * Decimal('1.5'))
+    return {
+        'salary_per_day': per_day,
+        'salary_per_hour': per_hour,
+        'overtime_pay_1_5': overtime_1_5,
+        'net_pay': (salary - advance - days_absent * per_day - hours_absent * per_hour +
+                    extra_days * per_day + extra_hours * per_hour + overtime_1_5),
+    }
+
+
+# Rows where the engine and the Decimal reference disagree, for a sample
+def check_against_reference(inputs, year, month, sample, seed=0):
+    result = payroll_engine.compute_payroll(inputs, year, month)
+    number_of_days = payroll_engine.days_in_month(year, month)
+    columns = payroll_engine.INPUT_COLUMNS[1:]
+    rows = random.Random(seed).sample(range(len(result)), min(sample, len(result)))
+    mismatches = []
+    for row in rows:
+        values = [inputs[name][row].item() for name in columns]
+        expected = decimal_reference(*values, number_of_days)
+        for name, amount in expected.items():
+            if payroll_engine.format_money(result[name][row]) != str(amount):
+                mismatches.append((row, name, result[name][row], amount))
+    return mismatches
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--check', type=int, default=10000,
+                        help='Employees compared with the Decimal reference (0 to skip).')
+    args = parser.parse_args()
+
+    inputs = synthetic_inputs(args.employees)
+    # Fractional salaries and advances exercise the half-cent rounding
+    inputs['monthly_salary'] += np.random.default_rng(1).integers(0, 1000, args.employees) / 1000
+    inputs['advanced_payment'] += np.random.default_rng(2).integers(0, 100, args.employees) / 100
+    scale = 100000 / args.employees
+
+    engine = best_of(args.repeat, payroll_engine.compute_payroll, inputs, 2024, 2)
+    loop = best_of(args.repeat, python_loop, inputs, 2024, 2)
+
+    print(f"employees:       {args.employees}")
+    print(f"payroll engine:  {engine * 1000:8.2f} ms ({engine * scale * 1000:.2f} ms per 100k employees)")
+    print(f"python loop:     {loop * 1000:8.2f} ms ({loop * scale * 1000:.2f} ms per 100k employees)")
+    print(f"speed-up:        {loop / engine:8.1f}x")
+
+    if args.check:
+        mismatches = []
+        for year, month in ((2024, 2), (2024, 4), (2025, 1)):
+            mismatches += check_against_reference(inputs, year, month, args.check)
+        for row, name, got, expected in mismatches[:20]:
+            print(f"row {row} {name}: engine {got} != reference {expected}")
+        if mismatches:
+            print(f"FAILED: {len(mismatches)} figures differ from the Decimal reference")
+            sys.exit(1)
+        print(f"reference check: {min(args.check, args.employees)} employees x 3 months agree")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""Measure route latency and throughput against a synthetic company.
+
+Seeds a temporary SQLite database with N employees, this month's payroll
+adjustments for most of them and document records for a sample, then hits
+each route through the Flask test client and reports p50/p95 latency and
+requests per second. Everything runs in-process and offline.
+
+Run from the application folder:
+
+    python benchmarks/routes.py --employees 10000 --output bench-10k.json
+    python benchmarks/routes.py --employees 10000 --compare bench-10k.json
+
+--compare prints the change against an earlier report and, with
+--fail-over, exits non-zero if any route's p95 got that many percent slower.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Share of employees that have adjustments this month / uploaded documents
+PAYROLL_SHARE = 0.8
+DOCUMENT_SHARE = 0.1
+DOCUMENTS_PER_EMPLOYEE = 30
+
+SEED_BATCH = 5000
+
+
+def seed(db, models, employees, rng):
+    from sqlalchemy import insert
+
+    now = datetime.now()
+    for start in range(0, employees, SEED_BATCH):
+        ids = range(start + 1, min(start + SEED_BATCH, employees) + 1)
+        db.session.execute(insert(models.Employee.__table__), [{
+            'id': i,
+            'name': f"Employee {rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}{i:07d}",
+            'monthly_salary': float(rng.randrange(2500, 25000)),
+            'phone_number': f"05{i:08d}",
+            'id_number': f"{i:09d}",
+            'start_date': date(rng.randint(2000, 2024), rng.randint(1, 12), rng.randint(1, 28)),
+            'address': f"Street {i % 500}",
+            'holidays_taken': rng.randint(0, 14),
+        } for i in ids])
+
+        db.session.execute(insert(models.PayrollEntry.__table__), [{
+            'employee_id': i, 'year': now.year, 'month': now.month,
+            'days_absent': rng.randint(0, 2), 'hours_absent': rng.randint(0, 8),
+            'extra_days': rng.randint(0, 2), 'extra_hours': rng.randint(0, 20),
+            'extra_hours_1_5': rng.randint(0, 20),
+            'advanced_payment': float(rng.randrange(0, 2000, 50)),
+            'salary_after': 0.0,
+        } for i in ids if rng.random() < PAYROLL_SHARE])
+
+        db.session.execute(insert(models.EmployeeDocument.__table__), [{
+            'employee_id': i,
+            'stored_filename': f"blobs/00/{i:064d}.pdf",
+            'original_name': f"document_{n}.pdf",
+            'document_date': date(rng.randint(2015, 2024), rng.randint(1, 12), rng.randint(1, 28)),
+            'size': rng.randrange(10_000, 2_000_000),
+            'mime': 'application/pdf',
+            'sha256': f"{i:064d}",
+            'uploaded_at': now,
+        } for i in ids if i % int(1 / DOCUMENT_SHARE) == 0 for n in range(DOCUMENTS_PER_EMPLOYEE)])
+    db.session.commit()
+
+
+# Route name -> function returning the URL for the next request
+def route_urls(employees, rng):
+    with_documents = list(range(int(1 / DOCUMENT_SHARE), employees + 1, int(1 / DOCUMENT_SHARE)))
+
+    def any_employee():
+        return rng.randint(1, employees)
+
+    return {
+        'employee_list': lambda: '/employee_list',
+        'employee_list_search': lambda: f"/employee_list?q=Employee+{rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}",
+        'employee_list_by_start_date': lambda: '/employee_list?sort=start_date&order=desc',
+        'admin_dashboard': lambda: '/admin_dashboard',
+        'employee_details': lambda: f"/employee_details/{any_employee()}",
+        'generate_pdf': lambda: f"/generate_pdf/{any_employee()}",
+        'employee_history': lambda: f"/employee_history/{rng.choice(with_documents or [1])}",
+    }
+
+
+def measure(client, url_for_request, requests, warmup):
+    for _ in range(warmup):
+        client.get(url_for_request())
+
+    timings = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        url = url_for_request()
+        began = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - began) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'requests': requests,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(quantiles[94], 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'requests_per_second': round(requests / elapsed, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, fail_over):
+    print(f"\n{'route':<30}{'p95 before':>12}{'p95 now':>12}{'change':>10}")
+    regressions = []
+    for name, now in report['routes'].items():
+        before = baseline['routes'].get(name)
+        if not before:
+            continue
+        change = (now['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+        print(f"{name:<30}{before['p95_ms']:>12.2f}{now['p95_ms']:>12.2f}{change:>+9.1f}%")
+        if fail_over is not None and change > fail_over:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=50, help='Timed requests per route.')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per route.')
+    parser.add_argument('--routes', help='Comma-separated subset of routes to run.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the JSON report here.')
+    parser.add_argument('--compare', help='Earlier JSON report to compare against.')
+    parser.add_argument('--fail-over', type=float, default=None,
+                        help='With --compare, fail if a p95 regressed by more than this percent.')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='baladna-routes-')
+    sys.path.insert(0, APP_DIR)
+    # Payslip template and document paths are relative to the application folder
+    os.chdir(APP_DIR)
+
+    from app import create_app
+    import models
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'employees.db')}",
+        'FRAGMENT_CACHE_PATH': os.path.join(workdir, 'fragments.db'),
+        'SESSION_PATH': os.path.join(workdir, 'sessions.db'),
+        'SEARCH_INDEX_PATH': os.path.join(workdir, 'search.db'),
+        'JOB_RESULTS_FOLDER': os.path.join(workdir, 'job_results'),
+        # Jobs queued by the routes are not worked during the timing
+        'JOB_WORKERS_IN_PROCESS': False,
+    })
+    rng = random.Random(args.seed)
+
+    try:
+        with app.app_context():
+            models.db.create_all()
+            started = time.perf_counter()
+            seed(models.db, models, args.employees, rng)
+            print(f"Seeded {args.employees} employees in {time.perf_counter() - started:.1f}s")
+
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['admin'] = {'username': 'benchmark'}
+
+        routes = route_urls(args.employees, rng)
+        if args.routes:
+            routes = {name: routes[name] for name in args.routes.split(',')}
+
+        report = {
+            'employees': args.employees,
+            'requests': args.requests,
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'routes': {},
+        }
+        print(f"{'route':<30}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}")
+        for name, next_url in routes.items():
+            result = measure(client, next_url, args.requests, args.warmup)
+            report['routes'][name] = result
+            print(f"{name:<30}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                  f"{result['requests_per_second']:>10.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.fail_over)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if regressions:
+        print(f"FAILED: p95 regressed more than {args.fail_over}% on {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Measure how long a fresh process takes to import the app and build it.
+
+Each run is a new interpreter (like a gunicorn worker or a test process), so
+nothing is shared between runs. Exits non-zero if the median exceeds the
+budget, or if PyMuPDF / Pillow are loaded before any PDF or thumbnail is
+rendered. Run from the application folder, e.g. in CI:
+
+    python benchmarks/startup.py --runs 5 --max-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported when a route first needs them
+LAZY_MODULES = ('fitz', 'pymupdf', 'PIL')
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+create_app()
+elapsed = time.perf_counter() - started
+print(json.dumps({'ms': elapsed * 1000,
+                  'loaded': sorted(m for m in %r if m in sys.modules)}))
+""" % (LAZY_MODULES,)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=1500,
+                        help='Fail if the median startup time is above this.')
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=APP_DIR)
+    timings = []
+    loaded = set()
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=APP_DIR, env=env,
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['ms'])
+        loaded.update(result['loaded'])
+
+    median = statistics.median(timings)
+    print(f"import + create_app: median {median:.0f} ms, "
+          f"min {min(timings):.0f} ms, max {max(timings):.0f} ms over {args.runs} runs")
+
+    failed = False
+    if median > args.max_ms:
+        print(f"FAILED: median startup {median:.0f} ms is over the {args.max_ms:.0f} ms budget")
+        failed = True
+    if loaded:
+        print(f"FAILED: imported at startup: {', '.join(sorted(loaded))}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Longest side an uploaded image is kept at; phone photos are 4000px and more
+IMAGE_MAX_DIMENSION = 2400
+JPEG_QUALITY = 82
+
+# Extension and MIME type of each re-encoded image format
+_IMAGE_FORMATS = {
+    'JPEG': ('jpg', 'image/jpeg'),
+    'PNG': ('png', 'image/png'),
+}
+
+
+def _is_pdf(path, mime):
+    return mime == 'application/pdf' or path.lower().endswith('.pdf')
+
+
+# Rewrite a PDF without unused objects, with every stream deflated and the
+# document metadata removed. PyMuPDF is imported on first use.
+def compact_pdf(path):
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        doc.set_metadata({})
+        doc.del_xml_metadata()
+        return doc.tobytes(garbage=4, deflate=True, deflate_images=True, deflate_fonts=True)
+
+
+# Re-encode a JPEG or PNG upright, no larger than max_dimension and without
+# EXIF (camera, GPS, ...). Returns (bytes, had_exif), or None for formats we
+# leave alone (GIF may be animated). Phone photos often open as MPO (a JPEG
+# with extra pictures such as a gain map); their first picture is kept as a
+# plain JPEG.
+def compact_image(path, max_dimension=IMAGE_MAX_DIMENSION, jpeg_quality=JPEG_QUALITY):
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as source:
+        fmt = 'JPEG' if source.format == 'MPO' else source.format
+        if fmt not in _IMAGE_FORMATS:
+            return None
+        source.seek(0)
+        had_exif = bool(source.info.get('exif'))
+        icc_profile = source.info.get('icc_profile')
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    output = io.BytesIO()
+    if fmt == 'JPEG':
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(output, 'JPEG', quality=jpeg_quality, optimize=True, progressive=True,
+                   icc_profile=icc_profile)
+    else:
+        image.save(output, 'PNG', optimize=True, icc_profile=icc_profile)
+    return output.getvalue(), had_exif
+
+
+# Smaller copy of a stored upload as (bytes, extension, mime), or None when
+# there is nothing to gain. Images carrying EXIF are always rewritten so the
+# metadata goes even if the file does not shrink.
+def compact_file(path, mime=None, max_dimension=IMAGE_MAX_DIMENSION, jpeg_quality=JPEG_QUALITY):
+    size = os.path.getsize(path)
+    if _is_pdf(path, mime):
+        data = compact_pdf(path)
+        return (data, 'pdf', 'application/pdf') if len(data) < size else None
+
+    result = compact_image(path, max_dimension, jpeg_quality)
+    if result is None:
+        return None
+    data, had_exif = result
+    if len(data) >= size and not had_exif:
+        return None
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        extension, compacted_mime = _IMAGE_FORMATS[image.format]
+    return data, extension, compacted_mime
+
+
+# Runs compact_file in a pool of worker processes, started on first use, so
+# large scans are decoded and encoded in parallel rather than in the job
+# workers' interpreter. A pool broken by a crashed worker (e.g. a corrupt
+# scan that kills the decoder) is replaced on the next call. Workers come
+# from a fork server: the caller is usually a job worker thread in a
+# threaded web process, and forking that could copy a lock another thread
+# holds into the child.
+class Compactor:
+    def __init__(self, workers=2, max_dimension=IMAGE_MAX_DIMENSION, jpeg_quality=JPEG_QUALITY,
+                 timeout=120):
+        self.workers = workers
+        self.max_dimension = max_dimension
+        self.jpeg_quality = jpeg_quality
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('forkserver'))
+            return self._executor
+
+    def compact(self, path, mime=None):
+        pool = self._pool()
+        try:
+            future = pool.submit(compact_file, path, mime, self.max_dimension, self.jpeg_quality)
+            return future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is pool:
+                    self._executor = None
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+import config
+
+
+# Normalise the configured URL (some hosts still hand out 'postgres://')
+def database_url(url=None):
+    url = url or config.DATABASE_URL
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+# SQLAlchemy engine options for the configured database
+def engine_options(url=None):
+    url = make_url(database_url(url))
+    options = {'pool_pre_ping': True}
+
+    # In-memory SQLite lives in a single connection, so there is no pool to size
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_recycle=config.DB_POOL_RECYCLE,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+        )
+
+    if url.get_backend_name() == 'sqlite':
+        # Let the driver wait for locks as well, and share connections across threads
+        options['connect_args'] = {
+            'timeout': config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            'check_same_thread': False,
+        }
+    return options
+
+
+# WAL lets readers carry on while one writer commits; NORMAL sync is safe
+# under WAL, and the busy timeout makes writers queue instead of failing
+# with "database is locked".
+@event.listens_for(Engine, 'connect')
+def _configure_sqlite(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}')
+        cursor.execute(f'PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}')
+    finally:
+        cursor.close()
+
+
+# One connection per thread to a SQLite file of its own, for the side stores
+# that live outside the main database (fragment cache, sessions, search
+# index). Connections use WAL with NORMAL sync, like the main engine.
+class ThreadConnections:
+    def __init__(self, path, timeout=5):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
@@ -0,0 +1,104 @@
+import re
+
+from markupsafe import Markup, escape
+
+from database import ThreadConnections
+
+# Text kept per document; the rest of a very long PDF is not searchable
+MAX_TEXT_CHARS = 1_000_000
+
+# Words of context around the matches in a result snippet
+SNIPPET_TOKENS = 16
+
+# Markers snippet() puts around matches, swapped for <mark> after escaping
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+
+# Plain text of every page of a PDF (empty for other files, which we do not
+# OCR). PyMuPDF is imported on first use.
+def extract_text(path, mime=None, max_chars=MAX_TEXT_CHARS):
+    if not (mime == 'application/pdf' or path.lower().endswith('.pdf')):
+        return ''
+    import fitz  # PyMuPDF
+
+    parts = []
+    length = 0
+    with fitz.open(path) as doc:
+        for page in doc:
+            text = page.get_text()
+            parts.append(text)
+            length += len(text)
+            if length >= max_chars:
+                break
+    return ''.join(parts)[:max_chars]
+
+
+# FTS5 query for what an admin typed: every word must appear, a trailing *
+# matches by prefix, and FTS syntax characters are taken literally
+def match_query(text):
+    terms = []
+    for word in text.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+        if not re.search(r'\w', word):
+            continue
+        terms.append('"' + word.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+# Escaped snippet with the matched words wrapped in <mark>
+def _highlight(snippet):
+    return Markup(str(escape(snippet)).replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>'))
+
+
+# Full-text index of document contents in a SQLite FTS5 table, kept in its
+# own file so it works whatever database holds the documents themselves.
+# The row id is the EmployeeDocument id; the employee id is stored alongside
+# so results can be narrowed to one employee.
+class DocumentIndex:
+    def __init__(self, path):
+        self.path = path
+        self._connections = ThreadConnections(path)
+        with self._connections.get() as conn:
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS document_text USING fts5("
+                         "name, body, employee_id UNINDEXED, "
+                         "tokenize = 'unicode61 remove_diacritics 2')")
+
+    # Add or replace one document
+    def index(self, document_id, employee_id, name, body):
+        with self._connections.get() as conn:
+            conn.execute('DELETE FROM document_text WHERE rowid = ?', (document_id,))
+            conn.execute('INSERT INTO document_text (rowid, name, body, employee_id) '
+                         'VALUES (?, ?, ?, ?)', (document_id, name, body, employee_id))
+
+    def remove(self, document_id):
+        with self._connections.get() as conn:
+            conn.execute('DELETE FROM document_text WHERE rowid = ?', (document_id,))
+
+    def clear(self):
+        with self._connections.get() as conn:
+            conn.execute('DELETE FROM document_text')
+
+    # Merge the index segments after a bulk load
+    def optimize(self):
+        with self._connections.get() as conn:
+            conn.execute("INSERT INTO document_text (document_text) VALUES ('optimize')")
+
+    # Best matches first as (document_id, employee_id, snippet), ranked by
+    # bm25 with hits in the file name counting double. Returns at most
+    # limit + 1 rows so callers can tell whether there is another page.
+    def search(self, text, employee_id=None, limit=20, offset=0):
+        query = match_query(text)
+        if not query:
+            return []
+        sql = ('SELECT rowid, employee_id, snippet(document_text, -1, ?, ?, ?, ?) '
+               'FROM document_text WHERE document_text MATCH ?')
+        params = [_MATCH_START, _MATCH_END, '…', SNIPPET_TOKENS, query]
+        if employee_id is not None:
+            sql += ' AND employee_id = ?'
+            params.append(employee_id)
+        sql += ' ORDER BY bm25(document_text, 2.0, 1.0) LIMIT ? OFFSET ?'
+        params += [limit + 1, offset]
+        rows = self._connections.get().execute(sql, params).fetchall()
+        return [(document_id, owner, _highlight(snippet)) for document_id, owner, snippet in rows]
@@ -0,0 +1,74 @@
+import hashlib
+import io
+import os
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+# Equivalent extensions stored under one name so identical content dedupes
+_EXTENSION_ALIASES = {'jpeg': 'jpg'}
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+# Blob path (relative to the storage root) for some content
+def blob_name(sha256, extension):
+    extension = extension.lower()
+    extension = _EXTENSION_ALIASES.get(extension, extension)
+    return os.path.join('blobs', sha256[:2], f"{sha256}.{extension}")
+
+
+# Copy an upload stream to disk in chunks while hashing it, then file it
+# under its SHA-256. Returns (sha256, size, blob name, created); created is
+# False when identical content was already stored and the copy was dropped.
+def store_upload(stream, extension, root, max_bytes, chunk_size=CHUNK_SIZE):
+    blobs_folder = os.path.join(root, 'blobs')
+    os.makedirs(blobs_folder, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(prefix='upload-', dir=blobs_folder)
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File is larger than {max_bytes // (1024 * 1024)} MB.")
+                digest.update(chunk)
+                tmp.write(chunk)
+
+        sha256 = digest.hexdigest()
+        name = blob_name(sha256, extension)
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            return sha256, size, name, False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return sha256, size, name, True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Store bytes produced on the server (e.g. a compacted upload) like an upload
+def store_bytes(data, extension, root):
+    return store_upload(io.BytesIO(data), extension, root, max_bytes=len(data))
+
+
+# Where a replaced blob is kept when originals are kept (relative to root)
+def original_name(name):
+    return os.path.join('originals', os.path.relpath(name, 'blobs'))
+
+
+# Move a stored file under originals/ and return its new relative name
+def keep_original(name, root):
+    kept = original_name(name)
+    path = os.path.join(root, kept)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(os.path.join(root, name), path)
+    return kept
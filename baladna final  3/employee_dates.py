@@ -0,0 +1,89 @@
+import calendar
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, case, or_, true
+
+from models import Employee, month_day
+
+# How start dates are typed in forms and import files and shown on pages
+DATE_FORMAT = '%d/%m/%Y'
+
+
+# A DD/MM/YYYY string as a date; raises ValueError for anything else
+def parse_date(text):
+    return datetime.strptime(text.strip(), DATE_FORMAT).date()
+
+
+def format_date(value):
+    return value.strftime(DATE_FORMAT) if value else ''
+
+
+def _month_day(day):
+    return day.month * 100 + day.day
+
+
+# The same day years later; 29 February falls on the 28th in other years
+def _same_day(day, year):
+    if day.month == 2 and day.day == 29 and not calendar.isleap(year):
+        return date(year, 2, 28)
+    return day.replace(year=year)
+
+
+# Filter for employees who started between start and end, both included.
+# Uses ix_employees_start_date_id.
+def hired_between(start, end):
+    return Employee.start_date.between(start, end)
+
+
+# Filter for employees who started in quarter 1-4 of year
+def hired_in_quarter(year, quarter):
+    first_month = 3 * (quarter - 1) + 1
+    start = date(year, first_month, 1)
+    end = (date(year + 1, 1, 1) if quarter == 4 else date(year, first_month + 3, 1)) - timedelta(days=1)
+    return hired_between(start, end)
+
+
+# Filter for employees who have served at least years full years on the day
+def with_tenure(years, on=None):
+    on = on or date.today()
+    return Employee.start_date <= _same_day(on, on.year - years)
+
+
+# Filter for employees whose work anniversary falls within days after start
+# (start included), whatever the year they started. Windows running past
+# 31 December wrap around to January. Uses ix_employees_start_month_day.
+def anniversary_window(start, days):
+    if days >= 365:
+        return true()
+    end = start + timedelta(days=days)
+    low, high = _month_day(start), _month_day(end)
+    # In a common year 29 February anniversaries are kept on the 28th
+    if end.month == 2 and end.day == 28 and not calendar.isleap(end.year):
+        high = 229
+    column = month_day(Employee.start_date)
+    if end.year == start.year:
+        return and_(column >= low, column <= high)
+    return or_(column >= low, column <= high)
+
+
+# Employees with a work anniversary in the next days days, soonest first, as
+# (employee, anniversary date, years of service). Employees who have not yet
+# served a full year are left out.
+def upcoming_anniversaries(start=None, days=30):
+    start = start or date.today()
+    column = month_day(Employee.start_date)
+    employees = (Employee.query
+                 .filter(anniversary_window(start, days), Employee.start_date < start)
+                 .order_by(case((column >= _month_day(start), 0), else_=1), column, Employee.name)
+                 .all())
+
+    upcoming = []
+    for employee in employees:
+        anniversary = _same_day(employee.start_date, start.year)
+        if anniversary < start:
+            anniversary = _same_day(employee.start_date, start.year + 1)
+        years = anniversary.year - employee.start_date.year
+        if years >= 1:
+            upcoming.append((employee, anniversary, years))
+    return upcoming
+
@@ -0,0 +1,146 @@
+import csv
+import io
+from datetime import date, datetime
+
+from sqlalchemy import insert
+
+# Columns read from an import file (header names are case-insensitive)
+IMPORT_COLUMNS = ('name', 'monthly_salary', 'phone_number', 'id_number', 'start_date', 'address')
+REQUIRED_COLUMNS = ('name', 'monthly_salary', 'id_number', 'start_date')
+
+# Column limits from the Employee model
+MAX_LENGTHS = {'name': 150, 'phone_number': 20, 'id_number': 50, 'address': 200}
+
+
+def _header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    # Spreadsheets hand back numeric ids as floats (123456789.0)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%d/%m/%Y')
+    return str(value).strip()
+
+
+def _csv_rows(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    header = [_header(h) for h in next(reader, [])]
+    for values in reader:
+        yield dict(zip(header, (_cell(v) for v in values)))
+
+
+def _xlsx_rows(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import needs the openpyxl package; upload a CSV instead.")
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_header(h) for h in next(rows, ())]
+        for values in rows:
+            yield dict(zip(header, (_cell(v) for v in values)))
+    finally:
+        workbook.close()
+
+
+# Stream the data rows of a CSV or XLSX upload as dicts keyed by column name
+def iter_rows(stream, filename):
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension == 'csv':
+        return _csv_rows(stream)
+    if extension == 'xlsx':
+        return _xlsx_rows(stream)
+    raise ValueError("Unsupported file type. Please upload a CSV or XLSX file.")
+
+
+# Check one row the same way the add_employee form does; returns (values, errors)
+def validate_row(row):
+    errors = []
+    for column in REQUIRED_COLUMNS:
+        if not row.get(column):
+            errors.append(f"{column} is required")
+
+    values = {column: row.get(column, '') for column in IMPORT_COLUMNS}
+    for column, limit in MAX_LENGTHS.items():
+        if len(values[column]) > limit:
+            errors.append(f"{column} is longer than {limit} characters")
+
+    if values['monthly_salary']:
+        try:
+            values['monthly_salary'] = float(values['monthly_salary'].replace(',', ''))
+            if values['monthly_salary'] < 0:
+                errors.append("monthly_salary must not be negative")
+        except ValueError:
+            errors.append("monthly_salary must be a number")
+
+    if values['start_date']:
+        try:
+            values['start_date'] = datetime.strptime(values['start_date'], '%d/%m/%Y').date()
+        except ValueError:
+            errors.append("start_date must use DD/MM/YYYY")
+
+    values['phone_number'] = values['phone_number'] or None
+    values['address'] = values['address'] or None
+    values['holidays_taken'] = 0
+    return values, errors
+
+
+# Validate and insert employees from rows in batches inside one transaction.
+# id_number uniqueness is checked against the database once per batch.
+# Returns a report with the number of rows read and imported and every
+# rejected row's line number and errors.
+def import_employees(rows, session, model, batch_size=1000):
+    report = {'rows': 0, 'imported': 0, 'errors': []}
+    seen = set()
+    batch = []
+
+    def flush():
+        id_numbers = [values['id_number'] for _, values in batch]
+        existing = {id_number for (id_number,) in session.query(model.id_number)
+                    .filter(model.id_number.in_(id_numbers))}
+        accepted = []
+        for line, values in batch:
+            if values['id_number'] in existing:
+                report['errors'].append({'row': line, 'errors': ["id_number already exists"]})
+            else:
+                accepted.append(values)
+        if accepted:
+            session.execute(insert(model.__table__), accepted)
+            report['imported'] += len(accepted)
+        batch.clear()
+
+    try:
+        # Line 1 is the header row
+        for line, row in enumerate(rows, start=2):
+            if not any(row.values()):
+                continue
+            report['rows'] += 1
+
+            values, errors = validate_row(row)
+            if not errors and values['id_number'] in seen:
+                errors.append("id_number appears more than once in the file")
+            if errors:
+                report['errors'].append({'row': line, 'errors': errors})
+                continue
+
+            seen.add(values['id_number'])
+            batch.append((line, values))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        session.commit()
+        report['errors'].sort(key=lambda error: error['row'])
+    except Exception:
+        session.rollback()
+        raise
+
+    return report
@@ -0,0 +1,60 @@
+import csv
+import io
+import tempfile
+import zlib
+
+# Rows buffered before a CSV chunk is handed to the client
+ROWS_PER_CHUNK = 500
+
+
+# Encode rows as CSV, yielding bytes every ROWS_PER_CHUNK rows. The header
+# goes out on its own so the first byte leaves before any row is read.
+def csv_stream(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    # BOM so Excel opens Arabic names correctly
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    yield take()
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % ROWS_PER_CHUNK == 0:
+            yield take()
+    tail = take()
+    if tail:
+        yield tail
+
+
+# Gzip a stream of byte chunks on the fly
+def gzip_stream(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# XLSX is a ZIP container and cannot be sent before it is complete, so rows
+# are written with openpyxl's write-only mode (constant memory) to a temp file
+def xlsx_file(header, rows, title='Export'):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append(list(row))
+
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,126 @@
+import json
+import threading
+from collections import OrderedDict
+
+from database import ThreadConnections
+from metrics import REGISTRY, Counter
+
+FRAGMENT_REQUESTS = REGISTRY.register(Counter(
+    'baladna_fragment_cache_requests_total', 'Rendered-fragment cache lookups, by fragment and result.'))
+
+
+# Fragments and data versions in this process only (one worker, or tests).
+# A bump in one worker is not seen by the others; use SQLiteBackend there.
+class MemoryBackend:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._versions = {}
+
+    def version(self, name):
+        with self._lock:
+            return self._versions.get(name, 0)
+
+    def bump(self, name):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            for key in [key for key in self._entries if key[0] == name]:
+                del self._entries[key]
+
+    def get(self, name, version, key):
+        with self._lock:
+            value = self._entries.get((name, version, key))
+            if value is not None:
+                self._entries.move_to_end((name, version, key))
+            return value
+
+    def set(self, name, version, key, value):
+        with self._lock:
+            # A bump may have happened while this fragment was rendering
+            if version != self._versions.get(name, 0):
+                return
+            self._entries[(name, version, key)] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Fragments and data versions in a SQLite file shared by every worker on the
+# host. Oldest entries are evicted first once max_entries is reached.
+class SQLiteBackend:
+    def __init__(self, path, max_entries=2048):
+        self.path = path
+        self.max_entries = max_entries
+        self._connections = ThreadConnections(path)
+        with self._connections.get() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS fragment_versions '
+                         '(name TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS fragments (name TEXT NOT NULL, '
+                         'version INTEGER NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+                         'PRIMARY KEY (name, version, key))')
+
+    def version(self, name):
+        row = self._connections.get().execute(
+            'SELECT version FROM fragment_versions WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, name):
+        with self._connections.get() as conn:
+            conn.execute('INSERT INTO fragment_versions (name, version) VALUES (?, 1) '
+                         'ON CONFLICT (name) DO UPDATE SET version = version + 1', (name,))
+            conn.execute('DELETE FROM fragments WHERE name = ?', (name,))
+
+    def get(self, name, version, key):
+        row = self._connections.get().execute(
+            'SELECT value FROM fragments WHERE name = ? AND version = ? AND key = ?',
+            (name, version, key)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, name, version, key, value):
+        with self._connections.get() as conn:
+            # Written only if no bump happened while this fragment was rendering
+            conn.execute('INSERT OR REPLACE INTO fragments (name, version, key, value) '
+                         'SELECT ?, ?, ?, ? WHERE ? = COALESCE((SELECT version FROM '
+                         'fragment_versions WHERE name = ?), 0)',
+                         (name, version, key, json.dumps(value), version, name))
+            conn.execute('DELETE FROM fragments WHERE rowid IN (SELECT rowid FROM fragments '
+                         'ORDER BY rowid DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+
+# Rendered template fragments keyed by a data version. Writers call bump()
+# after changing the data; every fragment rendered from the old data is then
+# unreachable, so readers never need to work out what a change touched.
+class FragmentCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    # Cached value for (name, key) at the current data version, or render()'s
+    # result (JSON-serialisable), stored for next time
+    def get_or_render(self, name, key, render):
+        key = json.dumps(key, sort_keys=True)
+        version = self.backend.version(name)
+        value = self.backend.get(name, version, key)
+        if value is not None:
+            self.hits += 1
+            FRAGMENT_REQUESTS.inc(fragment=name, result='hit')
+            return value
+
+        self.misses += 1
+        FRAGMENT_REQUESTS.inc(fragment=name, result='miss')
+        value = render()
+        self.backend.set(name, version, key, value)
+        return value
+
+    def bump(self, name):
+        self.backend.bump(name)
+
+
+# Backend from the FRAGMENT_CACHE_BACKEND setting ('memory' or 'sqlite')
+def create_backend(kind, path=None, max_entries=512):
+    if kind == 'memory':
+        return MemoryBackend(max_entries)
+    if kind == 'sqlite':
+        return SQLiteBackend(path, max_entries)
+    raise ValueError(f"Unknown fragment cache backend: {kind}")
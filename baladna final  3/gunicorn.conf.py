@@ -0,0 +1,34 @@
+# gunicorn settings for production: gunicorn -c gunicorn.conf.py wsgi:app
+# Every value can be overridden from the environment.
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Worker processes share sessions, the fragment cache and the job queue
+# through SQLite files and the database, so any number of them can serve
+# the same users
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Threads per worker; requests mostly wait on the database and PDF rendering
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# Payslip batches run as background jobs, but employee imports still run
+# inside the request: an upload at the MAX_CONTENT_LENGTH limit (about
+# 200,000 rows) takes around 10 s on SQLite, so this leaves room for a slower
+# database or disk
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to cap slow memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+# Each worker builds its own app: SQLite connections and worker threads must
+# not be inherited across fork
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
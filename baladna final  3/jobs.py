@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+from werkzeug.utils import secure_filename
+
+from models import db, Job
+
+# kind -> handler(payload) run inside an application context. A handler may
+# return a JobOutput; raising marks the attempt as failed.
+HANDLERS = {}
+
+# What a handler produced: optional file to download plus a JSON-able summary
+JobOutput = namedtuple('JobOutput', 'data filename mimetype info', defaults=(None, None, None, None))
+
+
+# Raised by a handler when retrying cannot help (bad input); the job fails at once
+class PermanentJobError(Exception):
+    pass
+
+
+def handler(kind):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+# Database-backed job queue worked by a local thread pool. Jobs are rows in
+# the jobs table, so they outlive the request that submitted them and any
+# worker process that dies mid-run. Every process may run workers; the
+# claim query keeps at most `concurrency` jobs running across all of them.
+# run_in_process starts the worker threads in this process on first use;
+# turn it off when `flask run-jobs` runs the workers separately.
+class JobQueue:
+    def __init__(self, app, concurrency=2, results_folder='job_results', max_attempts=3,
+                 retry_delay=10, lease_seconds=1800, poll_seconds=2, result_ttl=86400,
+                 run_in_process=True):
+        self.app = app
+        self.concurrency = concurrency
+        self.run_in_process = run_in_process
+        self.results_folder = results_folder
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._last_purge = 0.0
+
+    # Queue a job and return its id; call inside an application context
+    def submit(self, kind, payload=None, created_by=None, max_attempts=None):
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(id=uuid.uuid4().hex, kind=kind, payload=json.dumps(payload or {}),
+                  max_attempts=max_attempts or self.max_attempts, created_by=created_by)
+        db.session.add(job)
+        db.session.commit()
+        if self.run_in_process:
+            self.start()
+        self._wake.set()
+        return job.id
+
+    # Start the worker threads of this process (once)
+    def start(self, workers=None, daemon=True):
+        with self._lock:
+            if self._threads:
+                return
+            for number in range(workers or self.concurrency):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{number}', daemon=daemon)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    job_id = self._claim()
+                    if job_id is not None:
+                        self._execute(job_id)
+                        continue
+                    self._purge_expired()
+            except Exception as e:
+                print(f"Job worker error: {e}")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def _claimable(self, now):
+        return or_(and_(Job.status == 'queued', Job.run_after <= now),
+                   and_(Job.status == 'running', Job.locked_until <= now))
+
+    # Atomically mark the next due job as running; None if there is none or
+    # the concurrency limit is reached
+    def _claim(self):
+        now = datetime.now()
+        try:
+            job_id = (db.session.query(Job.id).filter(self._claimable(now))
+                      .order_by(Job.run_after).limit(1).scalar())
+            if job_id is None:
+                return None
+
+            running = (select(func.count()).select_from(Job)
+                       .where(Job.status == 'running', Job.locked_until > now)
+                       .scalar_subquery())
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, self._claimable(now), running < self.concurrency)
+                .values(status='running', attempts=Job.attempts + 1, started_at=now,
+                        locked_until=now + timedelta(seconds=self.lease_seconds))
+                .execution_options(synchronize_session=False))
+            db.session.commit()
+            return job_id if claimed.rowcount == 1 else None
+        finally:
+            db.session.remove()
+
+    def _execute(self, job_id):
+        job = db.session.get(Job, job_id)
+        if job.attempts > job.max_attempts:
+            # Claimed again after its worker died on the last allowed attempt
+            job.status = 'failed'
+            job.error = job.error or "Worker stopped while running the job."
+            job.finished_at = datetime.now()
+            db.session.commit()
+            db.session.remove()
+            return
+
+        try:
+            output = HANDLERS[job.kind](json.loads(job.payload))
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(Job, job_id)
+            job.error = f"{type(e).__name__}: {e}"
+            job.locked_until = None
+            if job.attempts < job.max_attempts and not isinstance(e, PermanentJobError):
+                # Back off 1x, 2x, 4x ... the retry delay
+                job.status = 'queued'
+                job.run_after = datetime.now() + timedelta(
+                    seconds=self.retry_delay * 2 ** (job.attempts - 1))
+            else:
+                job.status = 'failed'
+                job.finished_at = datetime.now()
+            db.session.commit()
+            print(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed: {e}")
+            return
+        finally:
+            db.session.remove()
+
+        job = db.session.get(Job, job_id)
+        try:
+            if output is not None:
+                if output.data is not None:
+                    job.result_path = self._save_result(job.id, output.filename, output.data)
+                    job.result_name = output.filename
+                    job.result_mime = output.mimetype
+                job.result = json.dumps(output.info or {})
+            job.status = 'done'
+            job.error = None
+            job.locked_until = None
+            job.finished_at = datetime.now()
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+    def _save_result(self, job_id, filename, data):
+        os.makedirs(self.results_folder, exist_ok=True)
+        path = os.path.join(self.results_folder, f"{job_id}-{secure_filename(filename or 'result')}")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+
+    # Drop finished jobs (and their files) older than result_ttl, at most
+    # once a minute per process
+    def _purge_expired(self):
+        if time.monotonic() - self._last_purge < 60:
+            return
+        self._last_purge = time.monotonic()
+        cutoff = datetime.now() - timedelta(seconds=self.result_ttl)
+        try:
+            expired = (Job.query.filter(Job.status.in_(('done', 'failed')), Job.finished_at < cutoff)
+                       .limit(500).all())
+            for job in expired:
+                if job.result_path and os.path.exists(job.result_path):
+                    os.remove(job.result_path)
+                db.session.delete(job)
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+    # Run due jobs in the calling thread until none are left (CLI and tests)
+    def run_pending(self):
+        count = 0
+        while True:
+            job_id = self._claim()
+            if job_id is None:
+                return count
+            self._execute(job_id)
+            count += 1
+
+
+# Status of a job as sent to API clients
+def describe(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'error': job.error,
+        'result': json.loads(job.result) if job.result else None,
+        'has_file': bool(job.result_path),
+        'created_at': job.created_at.isoformat(timespec='seconds'),
+        'started_at': job.started_at.isoformat(timespec='seconds') if job.started_at else None,
+        'finished_at': job.finished_at.isoformat(timespec='seconds') if job.finished_at else None,
+    }
@@ -0,0 +1,81 @@
+from datetime import date
+
+from sqlalchemy import update
+
+from models import db, Employee, LeaveBalance, LeaveEntry
+
+# Kinds of ledger entry; 'adjustment' gives days back, 'opening' carries over
+# the old holidays_taken counter
+LEAVE_TYPES = ('holiday', 'sick', 'unpaid', 'adjustment', 'opening')
+
+
+# An employee's balance for a year, or None if no leave was recorded yet
+def get_balance(employee_id, year):
+    return db.session.get(LeaveBalance, (employee_id, year))
+
+
+# Days taken and allowance for a year, whether or not leave was recorded
+def taken_and_allowance(employee_id, year, allowance):
+    balance = get_balance(employee_id, year)
+    if balance is None:
+        return 0, allowance
+    return balance.taken, balance.allowance
+
+
+# Append a ledger entry and move the year's balance by the same number of
+# days. The balance row is updated in place (taken = taken + days) so two
+# entries written at once cannot lose each other, and the new remaining
+# figure becomes the entry's running balance. Runs in the caller's
+# transaction; the caller commits.
+def record_leave(employee, days, type='holiday', on=None, allowance=14, created_by=None):
+    if type not in LEAVE_TYPES:
+        raise ValueError(f"Unknown leave type: {type}")
+    on = on or date.today()
+    key = (LeaveBalance.employee_id == employee.id, LeaveBalance.year == on.year)
+
+    balance = get_balance(employee.id, on.year)
+    if balance is None:
+        balance = LeaveBalance(employee_id=employee.id, year=on.year, allowance=allowance,
+                               taken=0, remaining=allowance)
+        db.session.add(balance)
+        db.session.flush()
+    db.session.execute(
+        update(LeaveBalance).where(*key)
+        .values(taken=LeaveBalance.taken + days, remaining=LeaveBalance.remaining - days)
+        .execution_options(synchronize_session=False))
+    db.session.refresh(balance)
+
+    entry = LeaveEntry(employee_id=employee.id, year=on.year, date=on, days=days, type=type,
+                       balance=balance.remaining, created_by=created_by)
+    db.session.add(entry)
+    # The employee list and payslips still read the counter for this year
+    if on.year == date.today().year:
+        employee.holidays_taken = balance.taken
+    return entry
+
+
+# Record whatever difference there is between the days taken this year and
+# `taken` (the holidays field of the employee details form)
+def set_taken(employee, taken, allowance=14, created_by=None):
+    today = date.today()
+    current, _ = taken_and_allowance(employee.id, today.year, allowance)
+    if taken == current:
+        return None
+    return record_leave(employee, taken - current, 'holiday' if taken > current else 'adjustment',
+                        on=today, allowance=allowance, created_by=created_by)
+
+
+# A year's ledger entries for one employee, newest first
+def ledger(employee_id, year):
+    return (LeaveEntry.query.filter_by(employee_id=employee_id, year=year)
+            .order_by(LeaveEntry.id.desc()).all())
+
+
+# (employee, balance) for everyone with fewer than `below` days left in the
+# year, fewest first. Reads the (year, remaining) index only; employees who
+# booked no leave still have their whole allowance and are not listed.
+def employees_below(year, below):
+    return (db.session.query(Employee, LeaveBalance)
+            .join(LeaveBalance, LeaveBalance.employee_id == Employee.id)
+            .filter(LeaveBalance.year == year, LeaveBalance.remaining < below)
+            .order_by(LeaveBalance.remaining, Employee.name).all())
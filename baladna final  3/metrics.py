@@ -0,0 +1,199 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request, session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latency buckets in seconds, from a cached page to a month of payslips
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Functions listed in a ?profile=1 summary
+PROFILE_ROWS = 40
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+# A monotonically increasing value per label set
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+
+# Observations counted into cumulative buckets per label set
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label key -> [bucket counts..., sum, count]
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, list(data)) for key, data in self._values.items())
+        samples = []
+        for key, data in values:
+            for bound, count in zip(self.buckets, data):
+                samples.append((f"{self.name}_bucket", key + (('le', _format_value(bound)),), count))
+            samples.append((f"{self.name}_bucket", key + (('le', '+Inf'),), data[-1]))
+            samples.append((f"{self.name}_sum", key, data[-2]))
+            samples.append((f"{self.name}_count", key, data[-1]))
+        return samples
+
+
+# A sample value at full precision (integers as integers), so large byte and
+# query counters keep moving
+def _format_value(value):
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer() and abs(value) < 2 ** 53):
+        return str(int(value))
+    return repr(float(value))
+
+
+# Metrics kept by this process. With several gunicorn workers each worker
+# reports its own values; Prometheus sums them per instance.
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    # Everything in the Prometheus text exposition format
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'baladna_http_request_duration_seconds', 'Time spent handling a request, by endpoint.'))
+QUERIES_PER_REQUEST = REGISTRY.register(Histogram(
+    'baladna_db_queries_per_request', 'SQL statements executed per request, by endpoint.',
+    buckets=QUERY_COUNT_BUCKETS))
+QUERY_SECONDS = REGISTRY.register(Histogram(
+    'baladna_db_query_duration_seconds', 'Time spent executing SQL statements, by endpoint.',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)))
+PDF_RENDER_SECONDS = REGISTRY.register(Histogram(
+    'baladna_pdf_render_seconds', 'Payslip rendering time by phase (open, insert_text, save).',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)))
+UPLOAD_BYTES = REGISTRY.register(Counter(
+    'baladna_upload_bytes_total', 'Bytes received in document uploads.'))
+UPLOADS = REGISTRY.register(Counter(
+    'baladna_uploads_total', 'Document uploads stored, by whether the content was new.'))
+COMPACTION_SAVED_BYTES = REGISTRY.register(Counter(
+    'baladna_compaction_saved_bytes_total', 'Bytes saved by compacting uploads, by file kind.'))
+COMPACTION_ADDED_BYTES = REGISTRY.register(Counter(
+    'baladna_compaction_added_bytes_total',
+    'Bytes added by re-encoding images to strip EXIF when that made them larger, by file kind.'))
+
+
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'none'
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    QUERY_SECONDS.observe(time.perf_counter() - started, endpoint=_endpoint())
+    if has_request_context() and 'query_count' in g:
+        g.query_count += 1
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.query_count = 0
+
+    # Admins can ask for a cProfile summary of a single request
+    if request.args.get('profile') == '1' and 'admin' in session:
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def _finish_request(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats('cumulative').print_stats(PROFILE_ROWS)
+        return Response(f"{request.method} {request.full_path} -> {response.status}, "
+                        f"{g.query_count} SQL statements\n\n{output.getvalue()}",
+                        mimetype='text/plain')
+
+    if 'request_started' in g:
+        endpoint = _endpoint()
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_started, endpoint=endpoint,
+                                method=request.method, status=response.status_code)
+        QUERIES_PER_REQUEST.observe(g.query_count, endpoint=endpoint)
+    return response
+
+
+# Time every request and count its SQL statements
+def init_app(app):
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
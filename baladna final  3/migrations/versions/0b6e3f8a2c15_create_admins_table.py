@@ -0,0 +1,36 @@
+"""Create admins table
+
+Revision ID: 0b6e3f8a2c15
+Revises: f5a2c9d1e6b3
+Create Date: 2026-10-17 13:41:09.128554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6e3f8a2c15'
+down_revision = 'f5a2c9d1e6b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('admins',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=80), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('picture', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('admins', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_admins_username'), ['username'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('admins', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_admins_username'))
+
+    op.drop_table('admins')
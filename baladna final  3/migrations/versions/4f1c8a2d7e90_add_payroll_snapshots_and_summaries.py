@@ -0,0 +1,78 @@
+"""Add payroll snapshots and summaries
+
+Revision ID: 4f1c8a2d7e90
+Revises: 9d4e2b7c1a63
+Create Date: 2026-10-17 16:21:08.734102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f1c8a2d7e90'
+down_revision = '9d4e2b7c1a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payroll_month_summaries',
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('payslips', sa.Integer(), nullable=False),
+    sa.Column('monthly_salary_cents', sa.BigInteger(), nullable=False),
+    sa.Column('overtime_cents', sa.BigInteger(), nullable=False),
+    sa.Column('extra_days_cents', sa.BigInteger(), nullable=False),
+    sa.Column('absence_cents', sa.BigInteger(), nullable=False),
+    sa.Column('advances_cents', sa.BigInteger(), nullable=False),
+    sa.Column('net_pay_cents', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('year', 'month')
+    )
+    op.create_table('payroll_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('revision', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=150), nullable=False),
+    sa.Column('id_number', sa.String(length=50), nullable=False),
+    sa.Column('days_absent', sa.Integer(), nullable=False),
+    sa.Column('hours_absent', sa.Integer(), nullable=False),
+    sa.Column('extra_days', sa.Integer(), nullable=False),
+    sa.Column('extra_hours', sa.Integer(), nullable=False),
+    sa.Column('extra_hours_1_5', sa.Integer(), nullable=False),
+    sa.Column('monthly_salary_cents', sa.BigInteger(), nullable=False),
+    sa.Column('overtime_cents', sa.BigInteger(), nullable=False),
+    sa.Column('extra_days_cents', sa.BigInteger(), nullable=False),
+    sa.Column('absence_cents', sa.BigInteger(), nullable=False),
+    sa.Column('advances_cents', sa.BigInteger(), nullable=False),
+    sa.Column('net_pay_cents', sa.BigInteger(), nullable=False),
+    sa.Column('created_by', sa.String(length=80), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('employee_id', 'year', 'month', 'revision', name='uq_payroll_snapshots_employee_month_revision')
+    )
+    with op.batch_alter_table('payroll_snapshots', schema=None) as batch_op:
+        batch_op.create_index('ix_payroll_snapshots_year_month', ['year', 'month'], unique=False)
+
+    op.create_table('payroll_year_summaries',
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('payslips', sa.Integer(), nullable=False),
+    sa.Column('monthly_salary_cents', sa.BigInteger(), nullable=False),
+    sa.Column('overtime_cents', sa.BigInteger(), nullable=False),
+    sa.Column('extra_days_cents', sa.BigInteger(), nullable=False),
+    sa.Column('absence_cents', sa.BigInteger(), nullable=False),
+    sa.Column('advances_cents', sa.BigInteger(), nullable=False),
+    sa.Column('net_pay_cents', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('year')
+    )
+
+
+def downgrade():
+    op.drop_table('payroll_year_summaries')
+    with op.batch_alter_table('payroll_snapshots', schema=None) as batch_op:
+        batch_op.drop_index('ix_payroll_snapshots_year_month')
+
+    op.drop_table('payroll_snapshots')
+    op.drop_table('payroll_month_summaries')
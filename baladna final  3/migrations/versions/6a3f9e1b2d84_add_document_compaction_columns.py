@@ -0,0 +1,32 @@
+"""Add document compaction columns
+
+Revision ID: 6a3f9e1b2d84
+Revises: b8e5d3a9c461
+Create Date: 2026-10-17 18:12:57.402911
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a3f9e1b2d84'
+down_revision = 'b8e5d3a9c461'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employee_documents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('original_sha256', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('original_size', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('original_filename', sa.String(length=255), nullable=True))
+        batch_op.create_index('ix_employee_documents_original_sha256', ['original_sha256'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('employee_documents', schema=None) as batch_op:
+        batch_op.drop_index('ix_employee_documents_original_sha256')
+        batch_op.drop_column('original_filename')
+        batch_op.drop_column('original_size')
+        batch_op.drop_column('original_sha256')
@@ -0,0 +1,36 @@
+"""Add indexes for employee list sorting and search
+
+Revision ID: a3c91e7d52b4
+Revises: 5f49c2c34a53
+Create Date: 2026-10-17 09:12:44.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c91e7d52b4'
+down_revision = '5f49c2c34a53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.create_index('ix_employees_name_id', ['name', 'id'], unique=False)
+        batch_op.create_index('ix_employees_monthly_salary_id', ['monthly_salary', 'id'], unique=False)
+
+    # Matches start_date_sort_key() in app.py: DD/MM/YYYY rewritten as YYYYMMDD
+    op.create_index('ix_employees_start_date_key_id', 'employees', [
+        sa.text("(substr(start_date, 7, 4) || substr(start_date, 4, 2) || substr(start_date, 1, 2))"),
+        'id',
+    ], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_employees_start_date_key_id', table_name='employees')
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_index('ix_employees_monthly_salary_id')
+        batch_op.drop_index('ix_employees_name_id')
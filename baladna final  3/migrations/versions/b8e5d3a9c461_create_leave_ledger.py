@@ -0,0 +1,77 @@
+"""Create leave ledger
+
+Revision ID: b8e5d3a9c461
+Revises: 4f1c8a2d7e90
+Create Date: 2026-10-17 17:05:39.118264
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e5d3a9c461'
+down_revision = '4f1c8a2d7e90'
+branch_labels = None
+depends_on = None
+
+# Allowance the holidays_taken counter was measured against
+ALLOWANCE = 14
+
+
+def upgrade():
+    op.create_table('leave_balances',
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('allowance', sa.Integer(), nullable=False),
+    sa.Column('taken', sa.Integer(), nullable=False),
+    sa.Column('remaining', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('employee_id', 'year')
+    )
+    with op.batch_alter_table('leave_balances', schema=None) as batch_op:
+        batch_op.create_index('ix_leave_balances_year_remaining', ['year', 'remaining'], unique=False)
+
+    op.create_table('leave_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('days', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=20), nullable=False),
+    sa.Column('balance', sa.Integer(), nullable=False),
+    sa.Column('created_by', sa.String(length=80), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('leave_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_leave_entries_employee_year', ['employee_id', 'year', 'id'], unique=False)
+
+    # The old counter becomes this year's opening entry and balance
+    year = date.today().year
+    connection = op.get_bind()
+    connection.execute(sa.text(
+        "INSERT INTO leave_balances (employee_id, year, allowance, taken, remaining) "
+        "SELECT id, :year, :allowance, holidays_taken, :allowance - holidays_taken "
+        "FROM employees WHERE holidays_taken <> 0"),
+        {'year': year, 'allowance': ALLOWANCE})
+    connection.execute(sa.text(
+        "INSERT INTO leave_entries (employee_id, year, date, days, type, balance, created_by, created_at) "
+        "SELECT id, :year, :opened, holidays_taken, 'opening', :allowance - holidays_taken, 'migration', :now "
+        "FROM employees WHERE holidays_taken <> 0"),
+        {'year': year, 'allowance': ALLOWANCE, 'opened': date(year, 1, 1).isoformat(),
+         'now': datetime.now().isoformat(sep=' ', timespec='seconds')})
+
+
+def downgrade():
+    with op.batch_alter_table('leave_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_leave_entries_employee_year')
+
+    op.drop_table('leave_entries')
+    with op.batch_alter_table('leave_balances', schema=None) as batch_op:
+        batch_op.drop_index('ix_leave_balances_year_remaining')
+
+    op.drop_table('leave_balances')
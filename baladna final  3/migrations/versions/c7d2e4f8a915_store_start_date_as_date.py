@@ -0,0 +1,103 @@
+"""Store employee start_date as a date
+
+Revision ID: c7d2e4f8a915
+Revises: 6a3f9e1b2d84
+Create Date: 2026-10-17 20:41:09.117342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2e4f8a915'
+down_revision = '6a3f9e1b2d84'
+branch_labels = None
+depends_on = None
+
+# Rows converted per UPDATE; each batch commits on its own so the table is
+# never locked for the whole backfill
+BATCH_SIZE = 5000
+
+# DD/MM/YYYY text to a date, per database. SQLite stores dates as YYYY-MM-DD.
+TO_DATE = {
+    'sqlite': "substr(start_date, 7, 4) || '-' || substr(start_date, 4, 2) || '-' || substr(start_date, 1, 2)",
+    'postgresql': "to_date(start_date, 'DD/MM/YYYY')",
+}
+FROM_DATE = {
+    'sqlite': "strftime('%d/%m/%Y', start_date)",
+    'postgresql': "to_char(start_date, 'DD/MM/YYYY')",
+}
+MONTH_DAY = {
+    'sqlite': "CAST(strftime('%m%d', start_date) AS INTEGER)",
+    'postgresql': "(EXTRACT(MONTH FROM start_date) * 100 + EXTRACT(DAY FROM start_date))",
+}
+
+
+# Copy start_date into column through expression, BATCH_SIZE ids at a time,
+# then once more for rows written while the batches ran
+def _backfill(column, expression):
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = bind.execute(sa.text('SELECT max(id) FROM employees')).scalar() or 0
+        for low in range(0, last_id + 1, BATCH_SIZE):
+            bind.execute(sa.text(f'UPDATE employees SET {column} = {expression} '
+                                 f'WHERE id >= :low AND id < :high AND {column} IS NULL'),
+                         {'low': low, 'high': low + BATCH_SIZE})
+        bind.execute(sa.text(f'UPDATE employees SET {column} = {expression} WHERE {column} IS NULL'))
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('start_date_value', sa.Date(), nullable=True))
+
+    _backfill('start_date_value', TO_DATE[dialect])
+
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT id, start_date FROM employees WHERE start_date_value IS NULL "
+        "OR start_date NOT LIKE '__/__/____'")).fetchall()
+    if invalid:
+        raise RuntimeError('Employees with a start_date that is not DD/MM/YYYY: ' +
+                           ', '.join(f'{id} ({start_date!r})' for id, start_date in invalid[:20]))
+
+    op.drop_index('ix_employees_start_date_key_id', table_name='employees')
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_column('start_date')
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.alter_column('start_date_value', new_column_name='start_date',
+                              existing_type=sa.Date(), nullable=False)
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.create_index('ix_employees_start_date_id', ['start_date', 'id'], unique=False)
+
+    # Matches models.month_day(): month and day as MMDD, for anniversaries
+    op.create_index('ix_employees_start_month_day', 'employees',
+                    [sa.text(MONTH_DAY[dialect])], unique=False)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    op.drop_index('ix_employees_start_month_day', table_name='employees')
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_index('ix_employees_start_date_id')
+        batch_op.add_column(sa.Column('start_date_text', sa.String(length=10), nullable=True))
+
+    _backfill('start_date_text', FROM_DATE[dialect])
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_column('start_date')
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.alter_column('start_date_text', new_column_name='start_date',
+                              existing_type=sa.String(length=10), nullable=False)
+
+    op.create_index('ix_employees_start_date_key_id', 'employees', [
+        sa.text("(substr(start_date, 7, 4) || substr(start_date, 4, 2) || substr(start_date, 1, 2))"),
+        'id',
+    ], unique=False)
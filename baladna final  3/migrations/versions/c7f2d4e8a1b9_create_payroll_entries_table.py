@@ -0,0 +1,38 @@
+"""Create payroll_entries table
+
+Revision ID: c7f2d4e8a1b9
+Revises: a3c91e7d52b4
+Create Date: 2026-10-17 10:03:27.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f2d4e8a1b9'
+down_revision = 'a3c91e7d52b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payroll_entries',
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('days_absent', sa.Integer(), nullable=False),
+    sa.Column('hours_absent', sa.Integer(), nullable=False),
+    sa.Column('extra_days', sa.Integer(), nullable=False),
+    sa.Column('extra_hours', sa.Integer(), nullable=False),
+    sa.Column('extra_hours_1_5', sa.Integer(), nullable=False),
+    sa.Column('advanced_payment', sa.Float(), nullable=False),
+    sa.Column('salary_after', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('employee_id', 'year', 'month')
+    )
+
+
+def downgrade():
+    op.drop_table('payroll_entries')
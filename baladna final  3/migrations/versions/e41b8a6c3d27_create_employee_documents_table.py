@@ -0,0 +1,41 @@
+"""Create employee_documents table
+
+Revision ID: e41b8a6c3d27
+Revises: c7f2d4e8a1b9
+Create Date: 2026-10-17 11:26:51.370482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41b8a6c3d27'
+down_revision = 'c7f2d4e8a1b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('employee_documents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('stored_filename', sa.String(length=255), nullable=False),
+    sa.Column('original_name', sa.String(length=255), nullable=False),
+    sa.Column('document_date', sa.Date(), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('mime', sa.String(length=100), nullable=True),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('employee_documents', schema=None) as batch_op:
+        batch_op.create_index('ix_employee_documents_employee_id_document_date', ['employee_id', 'document_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('employee_documents', schema=None) as batch_op:
+        batch_op.drop_index('ix_employee_documents_employee_id_document_date')
+
+    op.drop_table('employee_documents')
@@ -0,0 +1,39 @@
+"""Store documents by content hash
+
+Revision ID: f5a2c9d1e6b3
+Revises: e41b8a6c3d27
+Create Date: 2026-10-17 12:08:15.662930
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5a2c9d1e6b3'
+down_revision = 'e41b8a6c3d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employee_documents', schema=None) as batch_op:
+        batch_op.create_index('ix_employee_documents_sha256', ['sha256'], unique=False)
+
+    # stored_filename becomes relative to info_database/ so it can point at either
+    # a shared blob or a file in an employee's own folder
+    op.execute(
+        "UPDATE employee_documents SET stored_filename = 'employees/' || "
+        "(SELECT replace(name, ' ', '_') FROM employees WHERE employees.id = employee_documents.employee_id) "
+        "|| '/' || stored_filename"
+    )
+
+
+def downgrade():
+    op.execute(
+        "UPDATE employee_documents SET stored_filename = "
+        "substr(stored_filename, length(rtrim(stored_filename, replace(stored_filename, '/', ''))) + 1) "
+        "WHERE stored_filename LIKE 'employees/%'"
+    )
+
+    with op.batch_alter_table('employee_documents', schema=None) as batch_op:
+        batch_op.drop_index('ix_employee_documents_sha256')
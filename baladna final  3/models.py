@@ -0,0 +1,270 @@
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+# Bound to the application in create_app (app.py)
+db = SQLAlchemy()
+
+
+# Define the Employee model
+class Employee(db.Model):
+    __tablename__ = 'employees'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(150), nullable=False)
+    monthly_salary = db.Column(db.Float, nullable=False)
+    phone_number = db.Column(db.String(20), nullable=True)
+    id_number = db.Column(db.String(50), unique=True, nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    address = db.Column(db.String(200), nullable=True)
+    holidays_taken = db.Column(db.Integer, default=0)
+
+    __table_args__ = (
+        db.Index('ix_employees_name_id', 'name', 'id'),
+        db.Index('ix_employees_monthly_salary_id', 'monthly_salary', 'id'),
+        db.Index('ix_employees_start_date_id', 'start_date', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<Employee {self.name}>'
+
+# An administrator who can log in; the password is hashed once, when the admin is created
+class Admin(db.Model):
+    __tablename__ = 'admins'
+
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False, index=True)
+    password_hash = db.Column(db.String(255), nullable=False)
+    picture = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f'<Admin {self.username}>'
+
+# Payroll adjustments entered for an employee in a given month
+class PayrollEntry(db.Model):
+    __tablename__ = 'payroll_entries'
+
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id', ondelete='CASCADE'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    days_absent = db.Column(db.Integer, nullable=False, default=0)
+    hours_absent = db.Column(db.Integer, nullable=False, default=0)
+    extra_days = db.Column(db.Integer, nullable=False, default=0)
+    extra_hours = db.Column(db.Integer, nullable=False, default=0)
+    extra_hours_1_5 = db.Column(db.Integer, nullable=False, default=0)
+    advanced_payment = db.Column(db.Float, nullable=False, default=0.0)
+    salary_after = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+    employee = db.relationship('Employee', backref=db.backref(
+        'payroll_entries', lazy='dynamic', cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<PayrollEntry {self.employee_id} {self.month:02d}/{self.year}>'
+
+# Adjustment fields stored on a PayrollEntry
+PAYROLL_ADJUSTMENT_FIELDS = ('days_absent', 'hours_absent', 'extra_days', 'extra_hours',
+                             'extra_hours_1_5', 'advanced_payment')
+
+# One movement in an employee's leave: days taken (positive) or given back
+# (negative). balance is the days left in that year after this entry, set
+# when the entry is written; entries are never changed afterwards.
+class LeaveEntry(db.Model):
+    __tablename__ = 'leave_entries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id', ondelete='CASCADE'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    days = db.Column(db.Integer, nullable=False)
+    type = db.Column(db.String(20), nullable=False)
+    balance = db.Column(db.Integer, nullable=False)
+    created_by = db.Column(db.String(80), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    employee = db.relationship('Employee', backref=db.backref(
+        'leave_entries', lazy='dynamic', cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.Index('ix_leave_entries_employee_year', 'employee_id', 'year', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<LeaveEntry {self.employee_id} {self.date} {self.days:+d} {self.type}>'
+
+# Leave totals of an employee for a year, kept in step with the ledger
+class LeaveBalance(db.Model):
+    __tablename__ = 'leave_balances'
+
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id', ondelete='CASCADE'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    allowance = db.Column(db.Integer, nullable=False)
+    taken = db.Column(db.Integer, nullable=False, default=0)
+    remaining = db.Column(db.Integer, nullable=False)
+
+    employee = db.relationship('Employee', backref=db.backref(
+        'leave_balances', lazy='dynamic', cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.Index('ix_leave_balances_year_remaining', 'year', 'remaining'),
+    )
+
+    def __repr__(self):
+        return f'<LeaveBalance {self.employee_id} {self.year} {self.remaining}/{self.allowance}>'
+
+# One saved revision of an employee's payroll for a month. Rows are never
+# changed: saving the month again adds the next revision, and the highest
+# revision is the current one. Money is in integer cents so the summary
+# tables below can be kept up to date by exact additions. Name and ID number
+# are copied so the record outlives the employee.
+class PayrollSnapshot(db.Model):
+    __tablename__ = 'payroll_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    revision = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(150), nullable=False)
+    id_number = db.Column(db.String(50), nullable=False)
+    days_absent = db.Column(db.Integer, nullable=False)
+    hours_absent = db.Column(db.Integer, nullable=False)
+    extra_days = db.Column(db.Integer, nullable=False)
+    extra_hours = db.Column(db.Integer, nullable=False)
+    extra_hours_1_5 = db.Column(db.Integer, nullable=False)
+    monthly_salary_cents = db.Column(db.BigInteger, nullable=False)
+    overtime_cents = db.Column(db.BigInteger, nullable=False)
+    extra_days_cents = db.Column(db.BigInteger, nullable=False)
+    absence_cents = db.Column(db.BigInteger, nullable=False)
+    advances_cents = db.Column(db.BigInteger, nullable=False)
+    net_pay_cents = db.Column(db.BigInteger, nullable=False)
+    created_by = db.Column(db.String(80), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        db.UniqueConstraint('employee_id', 'year', 'month', 'revision',
+                            name='uq_payroll_snapshots_employee_month_revision'),
+        db.Index('ix_payroll_snapshots_year_month', 'year', 'month'),
+    )
+
+    def __repr__(self):
+        return f'<PayrollSnapshot {self.employee_id} {self.month:02d}/{self.year} r{self.revision}>'
+
+# Money columns summed by the summary tables
+PAYROLL_SUMMARY_COLUMNS = ('monthly_salary_cents', 'overtime_cents', 'extra_days_cents',
+                           'absence_cents', 'advances_cents', 'net_pay_cents')
+
+# Company totals of the current snapshots, per month and per year. Maintained
+# by payroll_history.record_snapshot as deltas, never by rescanning.
+class PayrollMonthSummary(db.Model):
+    __tablename__ = 'payroll_month_summaries'
+
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    payslips = db.Column(db.Integer, nullable=False, default=0)
+    monthly_salary_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    overtime_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    extra_days_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    absence_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    advances_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    net_pay_cents = db.Column(db.BigInteger, nullable=False, default=0)
+
+class PayrollYearSummary(db.Model):
+    __tablename__ = 'payroll_year_summaries'
+
+    year = db.Column(db.Integer, primary_key=True)
+    payslips = db.Column(db.Integer, nullable=False, default=0)
+    monthly_salary_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    overtime_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    extra_days_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    absence_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    advances_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    net_pay_cents = db.Column(db.BigInteger, nullable=False, default=0)
+
+# An uploaded document (scan, contract, ...) in an employee's folder
+class EmployeeDocument(db.Model):
+    __tablename__ = 'employee_documents'
+
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id', ondelete='CASCADE'), nullable=False)
+    # Path relative to INFO_DATABASE_FOLDER
+    stored_filename = db.Column(db.String(255), nullable=False)
+    original_name = db.Column(db.String(255), nullable=False)
+    document_date = db.Column(db.Date, nullable=True)
+    size = db.Column(db.Integer, nullable=False)
+    mime = db.Column(db.String(100), nullable=True)
+    sha256 = db.Column(db.String(64), nullable=False)
+    uploaded_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    # Set once the upload has been through compaction: the content as
+    # uploaded (equal to sha256/size when it was kept as is), and where that
+    # original is kept if KEEP_ORIGINAL_UPLOADS is on
+    original_sha256 = db.Column(db.String(64), nullable=True)
+    original_size = db.Column(db.Integer, nullable=True)
+    original_filename = db.Column(db.String(255), nullable=True)
+
+    employee = db.relationship('Employee', backref=db.backref(
+        'documents', lazy='dynamic', cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.Index('ix_employee_documents_employee_id_document_date', 'employee_id', 'document_date'),
+        db.Index('ix_employee_documents_sha256', 'sha256'),
+        db.Index('ix_employee_documents_original_sha256', 'original_sha256'),
+    )
+
+    def __repr__(self):
+        return f'<EmployeeDocument {self.stored_filename}>'
+
+# A unit of background work (see jobs.py). The row is the queue entry: workers
+# claim queued rows, and results are written to a file next to the database.
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    # JSON arguments for the handler
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    # queued, running, done or failed
+    status = db.Column(db.String(10), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    # A running job whose lease has expired was abandoned and is claimed again
+    locked_until = db.Column(db.DateTime, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    # JSON summary returned by the handler, and the downloadable result if any
+    result = db.Column(db.Text, nullable=True)
+    result_path = db.Column(db.String(255), nullable=True)
+    result_name = db.Column(db.String(255), nullable=True)
+    result_mime = db.Column(db.String(100), nullable=True)
+    created_by = db.Column(db.String(80), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+# Month and day of a date as MMDD (e.g. 1231), for anniversaries. Compiled
+# per database; both forms are deterministic so they can be indexed.
+class month_day(FunctionElement):
+    type = Integer()
+    inherit_cache = True
+
+@compiles(month_day)
+def _month_day(element, compiler, **kw):
+    date = compiler.process(element.clauses, **kw)
+    return f"(EXTRACT(MONTH FROM {date}) * 100 + EXTRACT(DAY FROM {date}))"
+
+@compiles(month_day, 'sqlite')
+def _month_day_sqlite(element, compiler, **kw):
+    return f"CAST(strftime('%m%d', {compiler.process(element.clauses, **kw)}) AS INTEGER)"
+
+db.Index('ix_employees_start_month_day', month_day(Employee.start_date))
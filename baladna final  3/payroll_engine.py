@@ -0,0 +1,166 @@
+from calendar import monthrange
+from functools import lru_cache
+
+import numpy as np
+
+HOURS_PER_DAY = 9
+# 1.5x overtime as a fraction, so it stays exact in integer cents
+OVERTIME_RATE = (3, 2)
+
+# Per-employee inputs, in the order load queries select them
+INPUT_COLUMNS = ('employee_id', 'monthly_salary', 'days_absent', 'hours_absent', 'extra_days',
+                 'extra_hours', 'extra_hours_1_5', 'advanced_payment')
+
+# Computed money columns; kept in integer cents and converted only for display
+MONEY_COLUMNS = ('monthly_salary', 'advanced_payment', 'salary_per_day', 'salary_per_hour',
+                 'overtime_pay', 'overtime_pay_1_5', 'extra_days_pay', 'absence_days_deduction',
+                 'absence_hours_deduction', 'net_pay')
+
+
+@lru_cache(maxsize=None)
+def days_in_month(year, month):
+    return monthrange(year, month)[1]
+
+
+# Amounts (floats from the database or forms) as integer cents, halves rounded
+# away from zero. The extra rounding to 6 places drops binary noise first, so
+# 1.005 counts as the 1.005 that was typed and becomes 101 cents.
+def to_cents(amounts):
+    scaled = np.round(np.asarray(amounts, dtype=np.float64) * 100, 6)
+    return (np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)).astype(np.int64)
+
+
+# numerator / denominator rounded half away from zero, in integers
+def divide_rounded(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.int64)
+    return np.sign(numerator) * ((2 * np.abs(numerator) + denominator) // (2 * denominator))
+
+
+# How every page, export and payslip prints an amount
+def format_money(amount):
+    return f"{amount:.2f}"
+
+
+# Columnar payroll figures for a month: one NumPy array per column, row i of
+# every column belonging to the same employee. Money columns are floats with
+# exactly two decimals, derived from the integer cents in .cents.
+class PayrollResult:
+    def __init__(self, year, month, columns, cents):
+        self.year = year
+        self.month = month
+        self.number_of_days = days_in_month(year, month)
+        self.cents = cents
+        self.columns = dict(columns)
+        for name, values in cents.items():
+            self.columns[name] = values / 100
+
+    def __len__(self):
+        return len(self.columns['employee_id'])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    # Plain-Python dicts, one per employee (for templates and PDF rendering)
+    def records(self):
+        names = list(self.columns)
+        values = zip(*(self.columns[name].tolist() for name in names))
+        return [dict(zip(names, row)) for row in values]
+
+    # Company-wide sums of the money columns, added up in cents
+    def totals(self):
+        totals = {name: int(self.cents[name].sum()) / 100 for name in (
+            'monthly_salary', 'overtime_pay', 'overtime_pay_1_5', 'extra_days_pay',
+            'absence_days_deduction', 'absence_hours_deduction', 'advanced_payment', 'net_pay')}
+        totals['employees'] = len(self)
+        return totals
+
+
+# The payroll rules for one month. All arithmetic is in integer cents with
+# halves rounded away from zero, in one place, so the details page, the
+# payslip PDF, exports and the dashboard totals can never differ by a fils.
+# Use calculator(year, month) to share one instance per period.
+class PayrollCalculator:
+    def __init__(self, year, month):
+        self.year = year
+        self.month = month
+        self.number_of_days = days_in_month(year, month)
+
+    # Per-day and per-hour rates in cents for arrays of monthly salaries in cents
+    def rate_arrays(self, salary_cents):
+        per_day = divide_rounded(salary_cents, self.number_of_days)
+        return per_day, divide_rounded(per_day, HOURS_PER_DAY)
+
+    # Compute the whole month in one vectorized pass. inputs maps each name in
+    # INPUT_COLUMNS to an array (missing adjustments count as zero).
+    def compute(self, inputs):
+        salary = to_cents(inputs['monthly_salary'])
+        size = salary.shape[0]
+
+        def column(name):
+            if name not in inputs:
+                return np.zeros(size, dtype=np.int64)
+            return np.asarray(inputs[name], dtype=np.int64)
+
+        days_absent = column('days_absent')
+        hours_absent = column('hours_absent')
+        extra_days = column('extra_days')
+        extra_hours = column('extra_hours')
+        extra_hours_1_5 = column('extra_hours_1_5')
+        advanced_payment = (to_cents(inputs['advanced_payment']) if 'advanced_payment' in inputs
+                            else np.zeros(size, dtype=np.int64))
+
+        salary_per_day, salary_per_hour = self.rate_arrays(salary)
+        numerator, denominator = OVERTIME_RATE
+
+        overtime_pay = extra_hours * salary_per_hour
+        overtime_pay_1_5 = divide_rounded(extra_hours_1_5 * salary_per_hour * numerator, denominator)
+        extra_days_pay = extra_days * salary_per_day
+        absence_days_deduction = days_absent * salary_per_day
+        absence_hours_deduction = hours_absent * salary_per_hour
+        net_pay = (salary - advanced_payment - absence_days_deduction - absence_hours_deduction +
+                   extra_days_pay + overtime_pay + overtime_pay_1_5)
+
+        return PayrollResult(self.year, self.month, {
+            'employee_id': column('employee_id'),
+            'days_absent': days_absent,
+            'hours_absent': hours_absent,
+            'extra_days': extra_days,
+            'extra_hours': extra_hours,
+            'extra_hours_1_5': extra_hours_1_5,
+        }, {
+            'monthly_salary': salary,
+            'advanced_payment': advanced_payment,
+            'salary_per_day': salary_per_day,
+            'salary_per_hour': salary_per_hour,
+            'overtime_pay': overtime_pay,
+            'overtime_pay_1_5': overtime_pay_1_5,
+            'extra_days_pay': extra_days_pay,
+            'absence_days_deduction': absence_days_deduction,
+            'absence_hours_deduction': absence_hours_deduction,
+            'net_pay': net_pay,
+        })
+
+    # Payroll figures for a single employee as a plain dict
+    def compute_one(self, monthly_salary, **adjustments):
+        inputs = {name: [value] for name, value in adjustments.items()}
+        inputs['monthly_salary'] = [monthly_salary]
+        return self.compute(inputs).records()[0]
+
+
+@lru_cache(maxsize=64)
+def calculator(year, month):
+    return PayrollCalculator(year, month)
+
+
+def compute_payroll(inputs, year, month):
+    return calculator(year, month).compute(inputs)
+
+
+# Build a result from database rows laid out as INPUT_COLUMNS
+def from_rows(rows, year, month):
+    table = np.array(rows, dtype=np.float64).reshape(-1, len(INPUT_COLUMNS))
+    return compute_payroll(dict(zip(INPUT_COLUMNS, table.T)), year, month)
+
+
+def compute_one(monthly_salary, year, month, **adjustments):
+    return calculator(year, month).compute_one(monthly_salary, **adjustments)
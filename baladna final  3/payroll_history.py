@@ -0,0 +1,152 @@
+from sqlalchemy import func, insert, select, update
+
+from models import (db, Employee, PayrollEntry, PayrollMonthSummary, PayrollSnapshot, PayrollYearSummary,
+                    PAYROLL_SUMMARY_COLUMNS)
+import payroll_engine
+
+
+def _cents(amount):
+    return int(round(amount * 100))
+
+
+# Snapshot money columns from payroll_engine figures
+def snapshot_amounts(figures):
+    return {
+        'monthly_salary_cents': _cents(figures['monthly_salary']),
+        'overtime_cents': _cents(figures['overtime_pay']) + _cents(figures['overtime_pay_1_5']),
+        'extra_days_cents': _cents(figures['extra_days_pay']),
+        'absence_cents': (_cents(figures['absence_days_deduction']) +
+                          _cents(figures['absence_hours_deduction'])),
+        'advances_cents': _cents(figures['advanced_payment']),
+        'net_pay_cents': _cents(figures['net_pay']),
+    }
+
+
+# Add deltas to one summary row, creating it on first use. SQLite and
+# PostgreSQL do it in a single atomic upsert; other databases update and
+# insert when no row was there.
+def _add_to_summary(model, keys, deltas):
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        statement = upsert(table).values(**keys, **deltas)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + statement.excluded[name] for name in deltas})
+        db.session.execute(statement)
+        return
+
+    updated = db.session.execute(
+        update(table).where(*(table.c[name] == value for name, value in keys.items()))
+        .values({name: table.c[name] + value for name, value in deltas.items()}))
+    if updated.rowcount == 0:
+        db.session.execute(insert(table).values(**keys, **deltas))
+
+
+def _apply(year, month, deltas):
+    if not any(deltas.values()):
+        return
+    _add_to_summary(PayrollMonthSummary, {'year': year, 'month': month}, deltas)
+    _add_to_summary(PayrollYearSummary, {'year': year}, deltas)
+
+
+# Latest snapshot of an employee's month, or None
+def latest_snapshot(employee_id, year, month):
+    return (PayrollSnapshot.query
+            .filter_by(employee_id=employee_id, year=year, month=month)
+            .order_by(PayrollSnapshot.revision.desc()).first())
+
+
+# Record the month's figures as the employee's next snapshot revision and add
+# the difference to the previous revision onto the month and year summaries.
+# Runs in the caller's transaction; the caller commits.
+def record_snapshot(employee, year, month, figures, created_by=None):
+    previous = latest_snapshot(employee.id, year, month)
+    amounts = snapshot_amounts(figures)
+
+    snapshot = PayrollSnapshot(
+        employee_id=employee.id, year=year, month=month,
+        revision=previous.revision + 1 if previous else 1,
+        name=employee.name, id_number=employee.id_number,
+        days_absent=int(figures['days_absent']), hours_absent=int(figures['hours_absent']),
+        extra_days=int(figures['extra_days']), extra_hours=int(figures['extra_hours']),
+        extra_hours_1_5=int(figures['extra_hours_1_5']),
+        created_by=created_by, **amounts)
+    db.session.add(snapshot)
+
+    deltas = {name: amounts[name] - (getattr(previous, name) if previous else 0)
+              for name in PAYROLL_SUMMARY_COLUMNS}
+    deltas['payslips'] = 0 if previous else 1
+    _apply(year, month, deltas)
+    return snapshot
+
+
+def _totals(summary):
+    totals = {name[:-len('_cents')]: (getattr(summary, name) if summary else 0) / 100
+              for name in PAYROLL_SUMMARY_COLUMNS}
+    totals['payslips'] = summary.payslips if summary else 0
+    return totals
+
+
+# Year-to-date company totals in currency units, from one primary-key read
+def year_to_date(year):
+    return _totals(db.session.get(PayrollYearSummary, year))
+
+
+# Company totals of a month's saved payslips, from one primary-key read
+def month_totals(year, month):
+    return _totals(db.session.get(PayrollMonthSummary, (year, month)))
+
+
+# Snapshot every saved month that has none yet, from the payroll table (for
+# data saved before snapshots existed). Returns the number created.
+def backfill_snapshots(created_by='backfill'):
+    snapshotted = select(PayrollSnapshot.id).where(
+        PayrollSnapshot.employee_id == PayrollEntry.employee_id,
+        PayrollSnapshot.year == PayrollEntry.year,
+        PayrollSnapshot.month == PayrollEntry.month).exists()
+    rows = (db.session.query(PayrollEntry, Employee)
+            .join(Employee, Employee.id == PayrollEntry.employee_id)
+            .filter(~snapshotted).all())
+    for entry, employee in rows:
+        figures = payroll_engine.compute_one(
+            employee.monthly_salary, entry.year, entry.month,
+            **{name: getattr(entry, name) for name in (
+                'days_absent', 'hours_absent', 'extra_days', 'extra_hours',
+                'extra_hours_1_5', 'advanced_payment')})
+        record_snapshot(employee, entry.year, entry.month, figures, created_by)
+    return len(rows)
+
+
+# Recompute both summary tables from the latest snapshot revisions. Only
+# needed after repairing data by hand; normal saves keep them current.
+def rebuild_summaries():
+    latest = (select(PayrollSnapshot.employee_id, PayrollSnapshot.year, PayrollSnapshot.month,
+                     func.max(PayrollSnapshot.revision).label('revision'))
+              .group_by(PayrollSnapshot.employee_id, PayrollSnapshot.year, PayrollSnapshot.month)
+              .subquery())
+    current = (select(PayrollSnapshot)
+               .join(latest, (PayrollSnapshot.employee_id == latest.c.employee_id) &
+                     (PayrollSnapshot.year == latest.c.year) &
+                     (PayrollSnapshot.month == latest.c.month) &
+                     (PayrollSnapshot.revision == latest.c.revision))
+               .subquery())
+    sums = [func.sum(current.c[name]).label(name) for name in PAYROLL_SUMMARY_COLUMNS]
+
+    db.session.query(PayrollMonthSummary).delete()
+    db.session.query(PayrollYearSummary).delete()
+    months = db.session.execute(
+        select(current.c.year, current.c.month, func.count().label('payslips'), *sums)
+        .group_by(current.c.year, current.c.month)).mappings().all()
+    years = db.session.execute(
+        select(current.c.year, func.count().label('payslips'), *sums)
+        .group_by(current.c.year)).mappings().all()
+    if months:
+        db.session.execute(insert(PayrollMonthSummary.__table__), [dict(row) for row in months])
+    if years:
+        db.session.execute(insert(PayrollYearSummary.__table__), [dict(row) for row in years])
+    return len(months)
@@ -0,0 +1,211 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from werkzeug.utils import secure_filename
+
+from metrics import PDF_RENDER_SECONDS
+from payroll_engine import format_money
+
+PAYSLIP_TEMPLATE = os.path.join("static/baladna salaries.pdf")
+
+FONT_SIZE = 12
+FONT_COLOR = (0, 0, 0)
+
+# Template document parsed once per worker process (see _init_worker)
+_worker_template = None
+
+
+# Keeps the payslip template bytes in memory, reloading them only when the
+# file's mtime changes
+class TemplateCache:
+    def __init__(self, path=PAYSLIP_TEMPLATE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = None
+        self._mtime = None
+
+    # Return (template bytes, version); raises FileNotFoundError if missing
+    def get(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        with self._lock:
+            if self._data is None or mtime != self._mtime:
+                with open(self.path, 'rb') as f:
+                    self._data = f.read()
+                self._mtime = mtime
+            return self._data, self._mtime
+
+
+# Size-bounded LRU cache of rendered payslips keyed by payslip_cache_key()
+class PayslipCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pdf
+
+    def put(self, key, pdf):
+        with self._lock:
+            self._entries[key] = pdf
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Content hash of everything that ends up on a payslip, plus the template
+# version, so an unchanged slip maps to the same key (and ETag)
+def payslip_cache_key(fields, template_version):
+    payload = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(f"{template_version}:{payload}".encode()).hexdigest()
+
+
+# Every value printed on the payslip, from a payroll record produced by
+# payroll_engine (inputs plus computed figures). Amounts are formatted here
+# with payroll_engine.format_money, exactly as the details page shows them.
+def payslip_fields(record, issue_date):
+    return {
+        'date': issue_date.strftime('%d/%m/%Y'),
+        'name': record['name'],
+        'id_number': record['id_number'],
+        'monthly_salary': format_money(record['monthly_salary']),
+        'total_extra_hours': record['extra_hours'] + record['extra_hours_1_5'],
+        'total_equivalent_hours': format_money(record['overtime_pay'] + record['overtime_pay_1_5']),
+        'extra_days': record['extra_days'],
+        'equivalent_days': format_money(record['extra_days_pay']),
+        'days_absent': record['days_absent'],
+        'equivalent_days_absent': format_money(record['absence_days_deduction']),
+        'hours_absent': record['hours_absent'],
+        'equivalent_hours_absent': format_money(record['absence_hours_deduction']),
+        'advanced_payment': format_money(record['advanced_payment']),
+        'salary_after': format_money(record['net_pay']),
+    }
+
+
+# Stamp the payslip fields onto a copy of the template and return the PDF bytes.
+# Phases are timed in metrics.PDF_RENDER_SECONDS; renders inside batch worker
+# processes are not reported.
+# PyMuPDF is imported here, not at module level, so importing the app stays fast.
+def render_payslip(template, fields):
+    import fitz  # PyMuPDF
+
+    with PDF_RENDER_SECONDS.time(phase='open'):
+        doc = fitz.open()
+        doc.insert_pdf(template)
+        page = doc[0]
+
+    def insert_text(position, text):
+        page.insert_text(position, text, fontsize=FONT_SIZE, color=FONT_COLOR)
+
+    with PDF_RENDER_SECONDS.time(phase='insert_text'):
+        insert_text((90, 263), fields['date'])
+        insert_text((370, 280), fields['name'])
+        insert_text((380, 302), fields['id_number'])
+        insert_text((255, 431), fields['monthly_salary'])
+        insert_text((265, 479), str(fields['total_extra_hours']))
+        insert_text((153, 479), fields['total_equivalent_hours'])
+        insert_text((280, 527), str(fields['extra_days']))
+        insert_text((160, 527), fields['equivalent_days'])
+        insert_text((300, 551), str(fields['days_absent']))
+        insert_text((178, 551), fields['equivalent_days_absent'])
+        insert_text((273, 575), str(fields['hours_absent']))
+        insert_text((161, 575), fields['equivalent_hours_absent'])
+        insert_text((338, 599), fields['advanced_payment'])
+        insert_text((254, 648), fields['salary_after'])
+
+    with PDF_RENDER_SECONDS.time(phase='save'):
+        pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+# Name used for a payslip inside a ZIP archive or as a download
+def payslip_filename(employee):
+    return secure_filename(f"{employee['id']}_{employee['name']}_details.pdf")
+
+
+def _init_worker(template_bytes):
+    import fitz  # PyMuPDF
+
+    global _worker_template
+    _worker_template = fitz.open('pdf', template_bytes)
+
+
+def _render_worker(fields):
+    return render_payslip(_worker_template, fields)
+
+
+# Render payslips for a month's payroll records in a process pool.
+# Returns (payload bytes, stats dict); fmt is 'zip' or 'pdf' (one merged PDF).
+# Workers receive the template bytes once and parse them in their initializer.
+def generate_batch(employees, fmt='zip', workers=None,
+                   template_bytes=None, progress=None):
+    if fmt not in ('zip', 'pdf'):
+        raise ValueError(f"Unknown batch format: {fmt}")
+    if template_bytes is None:
+        template_bytes, _ = TemplateCache().get()
+    if not employees:
+        raise ValueError("No employees to generate payslips for.")
+
+    import fitz  # PyMuPDF
+
+    issue_date = datetime.now()
+    jobs = [payslip_fields(e, issue_date) for e in employees]
+    total = len(jobs)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, total // (workers * 4))
+
+    output = io.BytesIO()
+    archive = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) if fmt == 'zip' else None
+    merged = fitz.open() if fmt == 'pdf' else None
+
+    started = time.perf_counter()
+    # Not forked: this runs on job worker threads, and forking a threaded
+    # process can leave the child stuck on a lock held by another thread
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(template_bytes,),
+                             mp_context=multiprocessing.get_context('forkserver')) as pool:
+        results = pool.map(_render_worker, jobs, chunksize=chunksize)
+        for done, (employee, pdf) in enumerate(zip(employees, results), start=1):
+            if archive is not None:
+                archive.writestr(payslip_filename(employee), pdf)
+            else:
+                with fitz.open('pdf', pdf) as slip:
+                    merged.insert_pdf(slip)
+            if progress:
+                progress(done, total)
+    elapsed = time.perf_counter() - started
+
+    if archive is not None:
+        archive.close()
+    else:
+        merged.save(output, garbage=3, deflate=True)
+        merged.close()
+
+    stats = {
+        'count': total,
+        'workers': workers,
+        'seconds': round(elapsed, 3),
+        'per_second': round(total / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    return output.getvalue(), stats
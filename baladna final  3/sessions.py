@@ -0,0 +1,201 @@
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from database import ThreadConnections
+from metrics import REGISTRY, Counter
+
+SESSION_REQUESTS = REGISTRY.register(Counter(
+    'baladna_session_cache_requests_total', 'Session lookups, by where they were answered.'))
+
+
+# Session data for one browser; the cookie only carries its opaque id
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False, expires=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires = expires
+        self.modified = False
+        self.previous_sid = None
+
+    # Move the data to a fresh id (call on login so an id handed out before
+    # authentication is never a logged-in one)
+    def regenerate(self):
+        if not self.new:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+# Sessions in a SQLite file shared by every worker on the host, read through
+# a small in-process LRU. A cached session is trusted for cache_seconds, so a
+# logout in one worker reaches the others within that time. Expired rows are
+# deleted by a background sweeper every sweep_seconds.
+class SQLiteSessionStore:
+    def __init__(self, path, cache_size=1024, cache_seconds=5, sweep_seconds=300):
+        self.path = path
+        self.cache_size = cache_size
+        self.cache_seconds = cache_seconds
+        self.sweep_seconds = sweep_seconds
+        self._connections = ThreadConnections(path)
+        self._lock = threading.Lock()
+        # sid -> (data, expires, cached_at)
+        self._cache = OrderedDict()
+        self._sweeper = None
+        with self._connections.get() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, '
+                         'data TEXT NOT NULL, expires REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires)')
+
+    def _remember(self, sid, data, expires):
+        with self._lock:
+            self._cache[sid] = (data, expires, time.monotonic())
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, sid):
+        with self._lock:
+            self._cache.pop(sid, None)
+
+    # (data, expires) of a live session, or None
+    def load(self, sid):
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(sid)
+            if cached is not None:
+                data, expires, cached_at = cached
+                if expires > now and time.monotonic() - cached_at < self.cache_seconds:
+                    self._cache.move_to_end(sid)
+                    SESSION_REQUESTS.inc(result='cache')
+                    return dict(data), expires
+                del self._cache[sid]
+
+        row = self._connections.get().execute(
+            'SELECT data, expires FROM sessions WHERE id = ? AND expires > ?', (sid, now)).fetchone()
+        if row is None:
+            SESSION_REQUESTS.inc(result='missing')
+            return None
+        SESSION_REQUESTS.inc(result='database')
+        data = json.loads(row[0])
+        self._remember(sid, data, row[1])
+        return dict(data), row[1]
+
+    def save(self, sid, data, expires):
+        with self._connections.get() as conn:
+            conn.execute('INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)',
+                         (sid, json.dumps(data), expires))
+        self._remember(sid, dict(data), expires)
+
+    def touch(self, sid, expires):
+        with self._connections.get() as conn:
+            conn.execute('UPDATE sessions SET expires = ? WHERE id = ?', (expires, sid))
+        self._forget(sid)
+
+    def delete(self, sid):
+        with self._connections.get() as conn:
+            conn.execute('DELETE FROM sessions WHERE id = ?', (sid,))
+        self._forget(sid)
+
+    # Delete expired sessions; returns how many were removed
+    def sweep(self):
+        with self._connections.get() as conn:
+            return conn.execute('DELETE FROM sessions WHERE expires <= ?', (time.time(),)).rowcount
+
+    # Start the sweeper thread of this process (once)
+    def start_sweeper(self):
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_forever, name='session-sweeper',
+                                             daemon=True)
+            self._sweeper.start()
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_seconds)
+            try:
+                self.sweep()
+            except sqlite3.Error as e:
+                print(f"Session sweep failed: {e}")
+
+
+# Flask session interface over a SQLiteSessionStore. Sessions last
+# PERMANENT_SESSION_LIFETIME; the expiry is pushed forward at most once per
+# refresh_seconds so a busy admin does not cost a write on every request.
+class ServerSessionInterface(SessionInterface):
+    def __init__(self, store, refresh_seconds=300):
+        self.store = store
+        self.refresh_seconds = refresh_seconds
+
+    def _new(self):
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def open_session(self, app, request):
+        self.store.start_sweeper()
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return self._new()
+        loaded = self.store.load(sid)
+        if loaded is None:
+            return self._new()
+        data, expires = loaded
+        return ServerSideSession(data, sid=sid, expires=expires)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.previous_sid:
+            self.store.delete(session.previous_sid)
+
+        if not session:
+            if not session.new and session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        now = time.time()
+        if session.modified:
+            session.expires = now + lifetime
+            self.store.save(session.sid, dict(session), session.expires)
+        elif session.expires - now < lifetime - self.refresh_seconds:
+            session.expires = now + lifetime
+            self.store.touch(session.sid, session.expires)
+        else:
+            return
+
+        response.vary.add('Cookie')
+        response.set_cookie(name, session.sid, expires=session.expires, domain=domain, path=path,
+                            secure=self.get_cookie_secure(app), httponly=self.get_cookie_httponly(app),
+                            samesite=self.get_cookie_samesite(app))
+
+
+# Use server-side sessions on app; SESSION_BACKEND 'cookie' keeps Flask's
+# signed-cookie sessions
+def init_app(app):
+    if app.config['SESSION_BACKEND'] == 'cookie':
+        return
+    if app.config['SESSION_BACKEND'] != 'sqlite':
+        raise ValueError(f"Unknown session backend: {app.config['SESSION_BACKEND']}")
+    store = SQLiteSessionStore(app.config['SESSION_PATH'],
+                               cache_size=app.config['SESSION_CACHE_SIZE'],
+                               cache_seconds=app.config['SESSION_CACHE_SECONDS'],
+                               sweep_seconds=app.config['SESSION_SWEEP_SECONDS'])
+    app.extensions['session_store'] = store
+    app.session_interface = ServerSessionInterface(store)
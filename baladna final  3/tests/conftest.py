@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+
+# An application on a fresh database in tmp_path, with every side store
+# (fragments, sessions, search index) there too. The working directory is
+# the application folder because the payslip template path is relative.
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(APP_DIR)
+    from app import create_app
+    from models import db
+
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'employees.db'}",
+        'FRAGMENT_CACHE_PATH': str(tmp_path / 'fragments.db'),
+        'SESSION_PATH': str(tmp_path / 'sessions.db'),
+        'SEARCH_INDEX_PATH': str(tmp_path / 'search.db'),
+        'JOB_RESULTS_FOLDER': str(tmp_path / 'job_results'),
+        'JOB_WORKERS_IN_PROCESS': False,
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+# A test client logged in as an admin
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['admin'] = {'username': 'tests'}
+    return client
@@ -0,0 +1,36 @@
+from PIL import Image
+
+from compaction import compact_file
+
+GPS_IFD = 0x8825
+MAKE = 0x010F
+
+
+# An MPO like a phone writes: a primary picture and a second one (gain map),
+# with camera and GPS EXIF
+def write_mpo(path, size=(3200, 2400)):
+    exif = Image.Exif()
+    exif[MAKE] = 'PhoneMaker'
+    exif[GPS_IFD] = {1: 'N', 2: (25.0, 17.0, 10.0)}
+    primary = Image.new('RGB', size, (200, 120, 40))
+    gain_map = Image.new('RGB', (size[0] // 4, size[1] // 4), (30, 30, 30))
+    primary.save(path, 'MPO', save_all=True, append_images=[gain_map], exif=exif, quality=95)
+
+
+def test_mpo_photo_is_compacted_to_a_plain_jpeg_without_exif(tmp_path):
+    path = tmp_path / 'photo.jpg'
+    write_mpo(path)
+    with Image.open(path) as image:
+        assert image.format == 'MPO' and image.info.get('exif')
+
+    data, extension, mime = compact_file(str(path), 'image/jpeg', max_dimension=1600)
+
+    assert (extension, mime) == ('jpg', 'image/jpeg')
+    compacted = tmp_path / 'compacted.jpg'
+    compacted.write_bytes(data)
+    with Image.open(compacted) as image:
+        assert image.format == 'JPEG'
+        assert getattr(image, 'n_frames', 1) == 1
+        assert not image.info.get('exif')
+        assert not image.getexif()
+        assert max(image.size) == 1600
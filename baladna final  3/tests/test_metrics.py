@@ -0,0 +1,17 @@
+from metrics import Counter, Histogram, Registry
+
+
+def test_large_counters_render_at_full_precision():
+    registry = Registry()
+    uploaded = registry.register(Counter('uploaded_bytes_total', 'Bytes.'))
+    uploaded.inc(123456789)
+    uploaded.inc(1)
+    seconds = registry.register(Histogram('took_seconds', 'Time.', buckets=(0.005, 1)))
+    seconds.observe(1234567.125)
+
+    lines = registry.render().splitlines()
+    assert 'uploaded_bytes_total 123456790' in lines
+    assert 'took_seconds_sum 1234567.125' in lines
+    assert 'took_seconds_bucket{le="0.005"} 0' in lines
+    assert 'took_seconds_bucket{le="1"} 0' in lines
+    assert 'took_seconds_bucket{le="+Inf"} 1' in lines
@@ -0,0 +1,101 @@
+import random
+import re
+from datetime import date, datetime
+
+import pytest
+
+import payroll_engine
+from models import db, Employee, PayrollEntry
+from payslips import payslip_fields
+from views import payroll_employees
+
+# Where render_payslip writes each figure (left edge and baseline)
+PDF_POSITIONS = {
+    'monthly_salary': (255, 431),
+    'total_equivalent_hours': (153, 479),
+    'equivalent_days': (160, 527),
+    'equivalent_days_absent': (178, 551),
+    'equivalent_hours_absent': (161, 575),
+    'advanced_payment': (338, 599),
+    'salary_after': (254, 648),
+}
+
+# Salaries that sit on rounding boundaries, plus random ones
+EDGE_SALARIES = [0.01, 1.005, 2.675, 999.995, 1234.565, 3100.0, 3000.0, 2790.0, 99999.99]
+
+
+def random_inputs(rng):
+    salary = (rng.choice(EDGE_SALARIES) if rng.random() < 0.3
+              else round(rng.uniform(0, 20000), rng.choice([0, 1, 2, 3])))
+    return salary, {
+        'days_absent': rng.randint(0, 31),
+        'hours_absent': rng.randint(0, 300),
+        'extra_days': rng.randint(0, 31),
+        'extra_hours': rng.randint(0, 300),
+        'extra_hours_1_5': rng.randint(0, 300),
+        'advanced_payment': round(rng.uniform(0, 5000), rng.choice([0, 2, 3])),
+        'holidays_taken': 0,
+    }
+
+
+# Text of the details page table cell next to label
+def page_cell(html, label):
+    match = re.search(rf'<td>{label}</td>\s*<td>([^<]*)</td>', html)
+    assert match, label
+    return match.group(1).strip()
+
+
+def page_input(html, name):
+    match = re.search(rf'name="{name}"\s+value="([^"]*)"', html)
+    assert match, name
+    return match.group(1)
+
+
+# Text the payslip PDF prints at each of PDF_POSITIONS
+def pdf_figures(pdf):
+    import fitz  # PyMuPDF
+
+    with fitz.open('pdf', pdf) as doc:
+        words = doc[0].get_text('words')
+    figures = {}
+    for name, (x, y) in PDF_POSITIONS.items():
+        found = [w[4] for w in words if abs(w[0] - x) < 1 and w[1] < y <= w[3] + 1]
+        assert len(found) == 1, (name, found)
+        figures[name] = found[0]
+    return figures
+
+
+# The details page and the payslip PDF are driven from the same saved inputs
+# and must print the same amounts, and both must match payslip_fields
+@pytest.mark.parametrize('seed', range(40))
+def test_details_page_and_payslip_print_the_same_amounts(app, client, seed):
+    rng = random.Random(seed)
+    salary, adjustments = random_inputs(rng)
+    with app.app_context():
+        employee = Employee(name=f'Employee {seed}', monthly_salary=salary, id_number=str(seed),
+                            start_date=date(2020, 1, 1), holidays_taken=0)
+        db.session.add(employee)
+        db.session.commit()
+        employee_id = employee.id
+
+    response = client.post(f'/employee_details/{employee_id}', data=adjustments)
+    assert response.status_code == 302
+
+    html = client.get(f'/employee_details/{employee_id}').get_data(as_text=True)
+    response = client.get(f'/generate_pdf/{employee_id}')
+    assert response.mimetype == 'application/pdf'
+    pdf = pdf_figures(response.data)
+
+    assert page_cell(html, 'Salary Before') == pdf['monthly_salary']
+    assert page_cell(html, 'Salary After') == pdf['salary_after']
+    assert page_input(html, 'advanced_payment') == pdf['advanced_payment']
+
+    with app.app_context():
+        now = datetime.now()
+        record = payroll_employees(now.year, now.month, [employee_id])[0]
+        fields = payslip_fields(record, now)
+        assert {name: fields[name] for name in PDF_POSITIONS} == pdf
+        # The net pay saved with the entry when the form was posted is the one
+        # both of them print
+        entry = db.session.get(PayrollEntry, (employee_id, now.year, now.month))
+        assert payroll_engine.format_money(entry.salary_after) == pdf['salary_after']
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+THUMBNAIL_FOLDER = os.path.join('static', 'thumbnails')
+THUMBNAIL_SIZE = (200, 200)
+THUMBNAIL_QUALITY = 80
+
+
+# Where the preview for a given content hash is cached
+def thumbnail_path(sha256, folder=THUMBNAIL_FOLDER):
+    return os.path.join(folder, sha256[:2], f"{sha256}.webp")
+
+
+# Render a small WebP preview of an image or of page 1 of a PDF. PyMuPDF and
+# Pillow are imported on the first render rather than with the app.
+def render_thumbnail(source_path, destination, mime=None, size=THUMBNAIL_SIZE):
+    import fitz  # PyMuPDF
+    from PIL import Image, ImageOps
+
+    if mime == 'application/pdf' or source_path.lower().endswith('.pdf'):
+        with fitz.open(source_path) as doc:
+            page = doc[0]
+            zoom = min(size[0] / page.rect.width, size[1] / page.rect.height) * 2
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            image = Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+    else:
+        with Image.open(source_path) as source:
+            image = ImageOps.exif_transpose(source)
+            image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    image.thumbnail(size)
+
+    # Write to a temporary file first so readers never see a half-written preview
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.webp', dir=os.path.dirname(destination))
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            image.save(tmp, 'WEBP', quality=THUMBNAIL_QUALITY)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+# Lazily generates previews in a thread pool and serves them from the disk
+# cache afterwards. Concurrent requests for the same hash share one render.
+class ThumbnailCache:
+    def __init__(self, folder=THUMBNAIL_FOLDER, workers=2, timeout=30):
+        self.folder = folder
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnail')
+        # Re-entrant: a future that is already done runs its callback immediately
+        self._lock = threading.RLock()
+        self._pending = {}
+
+    # Path of the cached preview, rendering it first if needed
+    def get(self, sha256, source_path, mime=None):
+        path = thumbnail_path(sha256, self.folder)
+        if os.path.exists(path):
+            return path
+
+        with self._lock:
+            future = self._pending.get(sha256)
+            if future is None:
+                future = self._executor.submit(render_thumbnail, source_path, path, mime)
+                self._pending[sha256] = future
+                future.add_done_callback(lambda _, key=sha256: self._forget(key))
+        future.result(timeout=self.timeout)
+        return path
+
+    def _forget(self, sha256):
+        with self._lock:
+            self._pending.pop(sha256, None)
+
+    # Drop the cached preview once no document uses this content any more
+    def remove(self, sha256):
+        path = thumbnail_path(sha256, self.folder)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,1270 @@
+import os
+from datetime import date, datetime
+import io
+import base64
+import hashlib
+import json
+import mimetypes
+import time
+from flask import (Blueprint, Response, current_app, render_template, request, redirect, url_for,
+                   session, send_file, flash, jsonify, stream_with_context)
+from markupsafe import Markup
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+from sqlalchemy import and_, or_, tuple_
+from werkzeug.security import generate_password_hash, check_password_hash
+import click
+import assets
+import config
+import jobs
+import leave
+import metrics
+import payroll_engine
+import payroll_history
+from document_search import extract_text
+from document_store import (UploadTooLarge, keep_original, original_name, store_bytes,
+                            store_upload)
+from employee_dates import format_date, parse_date, upcoming_anniversaries
+from employee_import import import_employees
+from exports import csv_stream, gzip_stream, xlsx_file
+from employee_import import iter_rows as iter_import_rows
+from models import (db, Admin, Employee, EmployeeDocument, Job, PayrollEntry,
+                    PAYROLL_ADJUSTMENT_FIELDS)
+from payslips import (TemplateCache, generate_batch, payslip_cache_key, payslip_fields,
+                      render_payslip)
+
+# Routes and CLI commands; registered on the application by create_app (app.py).
+# cli_group=None keeps the commands at the top level (flask generate-payslips).
+bp = Blueprint('main', __name__, cli_group=None)
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
+
+# Uploaded documents are stored once per content hash under info_database/blobs;
+# older uploads still live in one folder per employee under info_database/employees
+INFO_DATABASE_FOLDER = os.path.join('baladna final', 'static', 'info_database')
+EMPLOYEE_FILES_FOLDER = os.path.join(INFO_DATABASE_FOLDER, 'employees')
+
+# Columns the employee tables can be sorted by
+EMPLOYEE_SORT_COLUMNS = {
+    'name': Employee.name,
+    'salary': Employee.monthly_salary,
+    'start_date': Employee.start_date,
+}
+
+# Payslip template held in memory (rendered payslips are cached per application,
+# see create_app)
+template_cache = TemplateCache()
+
+# Custom number format filter for Jinja2
+@bp.app_template_filter('number_format')
+def number_format(value, decimal_places=2):
+    return f"{float(value):,.{decimal_places}f}"
+
+# Dates as DD/MM/YYYY, the format the forms and imports use
+@bp.app_template_filter('date_format')
+def date_format(value):
+    return format_date(value)
+
+# Function to check if a file is allowed
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+# Hash a new admin password with the configured KDF and cost
+def hash_admin_password(password):
+    return generate_password_hash(password, method=config.PASSWORD_HASH_METHOD)
+
+# The built-in admin from config.py, stored with its precomputed hash the first
+# time the admins table is found empty
+def ensure_default_admin():
+    if db.session.query(Admin.id).first() is None:
+        db.session.add(Admin(username=config.ADMIN_USERNAME, password_hash=config.ADMIN_PASSWORD))
+        db.session.commit()
+
+# Folder holding an employee's uploaded documents
+def employee_directory(employee_name):
+    return os.path.join(EMPLOYEE_FILES_FOLDER, employee_name.replace(" ", "_"))
+
+# Where a document is on disk, and its URL
+def document_path(document):
+    return os.path.join(INFO_DATABASE_FOLDER, document.stored_filename)
+
+# What release_stored_files needs of a document; read it before the row is deleted
+def stored_files(document):
+    return (document.id, document_path(document), document.stored_filename, document.sha256,
+            document.original_filename)
+
+# Drop the search index rows of deleted documents, and their stored files,
+# previews and kept originals once no remaining document references them
+# (stored content is shared). Call after the deletion is committed.
+def release_stored_files(files):
+    index = current_app.extensions['document_index']
+    for document_id, file_path, stored_filename, sha256, kept_original in files:
+        index.remove(document_id)
+        if not EmployeeDocument.query.filter_by(sha256=sha256).first():
+            current_app.extensions['thumbnail_cache'].remove(sha256)
+        if not EmployeeDocument.query.filter_by(stored_filename=stored_filename).first():
+            # Also drop the date sidecar left over from before documents were indexed
+            for path in (file_path, f"{file_path}_date.txt"):
+                if os.path.exists(path):
+                    os.remove(path)
+        if kept_original and not EmployeeDocument.query.filter_by(original_filename=kept_original).first():
+            kept_path = os.path.join(INFO_DATABASE_FOLDER, kept_original)
+            if os.path.exists(kept_path):
+                os.remove(kept_path)
+
+def document_url(document):
+    return url_for('static', filename=f"info_database/{document.stored_filename.replace(os.sep, '/')}")
+
+# SHA-256 and size of a file on disk, read in chunks
+def file_digest(path):
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+# Parse a DD/MM/YYYY document date; None if it is missing or malformed
+def parse_document_date(value):
+    try:
+        return datetime.strptime(value.strip(), '%d/%m/%Y').date()
+    except (AttributeError, ValueError):
+        return None
+
+# Parse a 'MM/YYYY' payroll month, defaulting to the current month
+def parse_payroll_month(value):
+    if not value:
+        now = datetime.now()
+        return now.year, now.month
+    parsed = datetime.strptime(value, '%m/%Y')
+    return parsed.year, parsed.month
+
+# Look up an employee's adjustments for one month by primary key
+def get_payroll_entry(employee_id, year, month):
+    return db.session.get(PayrollEntry, (employee_id, year, month))
+
+# Payroll engine inputs (payroll_engine.INPUT_COLUMNS) for every employee in
+# a month; employees without an entry get zero adjustments
+def payroll_query(year, month, *extra_columns):
+    adjustments = [db.func.coalesce(getattr(PayrollEntry, field), 0)
+                   for field in PAYROLL_ADJUSTMENT_FIELDS]
+    return (db.session.query(Employee.id, Employee.monthly_salary, *adjustments, *extra_columns)
+            .outerjoin(PayrollEntry, and_(PayrollEntry.employee_id == Employee.id,
+                                          PayrollEntry.year == year,
+                                          PayrollEntry.month == month))
+            .order_by(Employee.id))
+
+# Payroll records (inputs and computed figures) for one month, optionally
+# restricted to some employees
+def payroll_employees(year, month, employee_ids=None):
+    query = payroll_query(year, month, Employee.name, Employee.id_number, Employee.holidays_taken)
+    if employee_ids is not None:
+        query = query.filter(Employee.id.in_(employee_ids))
+    rows = query.all()
+    width = len(payroll_engine.INPUT_COLUMNS)
+    result = payroll_engine.from_rows([row[:width] for row in rows], year, month)
+
+    records = result.records()
+    for record, row in zip(records, rows):
+        record.update(id=record['employee_id'], name=row.name, id_number=row.id_number,
+                      holidays_taken=row.holidays_taken or 0)
+    return records
+
+# Payroll records for one month, computed chunk by chunk while streaming rows
+# from the database so memory stays flat for any number of employees
+def iter_payroll_records(year, month, chunk_size):
+    width = len(payroll_engine.INPUT_COLUMNS)
+    query = payroll_query(year, month, Employee.name, Employee.id_number).yield_per(chunk_size)
+    chunk = []
+
+    def compute(rows):
+        records = payroll_engine.from_rows([row[:width] for row in rows], year, month).records()
+        for record, row in zip(records, rows):
+            record.update(name=row.name, id_number=row.id_number)
+        return records
+
+    for row in query:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from compute(chunk)
+            chunk = []
+    if chunk:
+        yield from compute(chunk)
+
+# Query arguments that select a page of the employee table
+EMPLOYEE_TABLE_ARGS = ('sort', 'order', 'q', 'per_page', 'after', 'before')
+
+# Call after any change to the columns the employee table shows; cached
+# pages rendered from the old data are dropped
+def employee_table_changed():
+    current_app.extensions['fragment_cache'].bump('employee_table')
+
+def encode_cursor(sort_value, employee_id):
+    if isinstance(sort_value, date):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, employee_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+# Dates travel as ISO strings; pass as_date to get them back as dates
+def decode_cursor(cursor, as_date=False):
+    try:
+        sort_value, employee_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if as_date:
+            sort_value = date.fromisoformat(sort_value)
+        return sort_value, int(employee_id)
+    except (ValueError, TypeError):
+        return None
+
+# Keyset-paginated, sorted and prefix-searched page of employees.
+# Only the rows of the requested page are loaded from the database.
+def paginate_employees(args):
+    sort = args.get('sort', 'name')
+    if sort not in EMPLOYEE_SORT_COLUMNS:
+        sort = 'name'
+    order = 'desc' if args.get('order') == 'desc' else 'asc'
+    q = args.get('q', '').strip()
+    per_page = args.get('per_page', current_app.config['EMPLOYEES_PER_PAGE'], type=int)
+    per_page = max(1, min(per_page, current_app.config['EMPLOYEES_MAX_PER_PAGE']))
+    sort_column = EMPLOYEE_SORT_COLUMNS[sort]
+
+    query = db.session.query(Employee, sort_column)
+    if q:
+        # Range comparisons instead of LIKE so the name and id_number indexes are used
+        upper = q + '\U0010ffff'
+        query = query.filter(or_(and_(Employee.name >= q, Employee.name < upper),
+                                 and_(Employee.id_number >= q, Employee.id_number < upper)))
+
+    as_date = sort == 'start_date'
+    after = decode_cursor(args['after'], as_date) if args.get('after') else None
+    before = decode_cursor(args['before'], as_date) if args.get('before') and not after else None
+    # Walking backwards from a 'before' cursor reverses the scan direction
+    forward = (order == 'asc') != bool(before)
+    key = tuple_(sort_column, Employee.id)
+    cursor = after or before
+    if cursor:
+        query = query.filter(key > tuple_(*cursor) if forward else key < tuple_(*cursor))
+    if forward:
+        query = query.order_by(sort_column.asc(), Employee.id.asc())
+    else:
+        query = query.order_by(sort_column.desc(), Employee.id.desc())
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if before:
+        rows.reverse()
+
+    has_next = has_more if not before else True
+    has_prev = has_more if before else bool(after)
+    return {
+        'employees': [employee for employee, _ in rows],
+        'sort': sort,
+        'order': order,
+        'q': q,
+        'per_page': per_page,
+        'next_cursor': encode_cursor(rows[-1][1], rows[-1][0].id) if rows and has_next else None,
+        'prev_cursor': encode_cursor(rows[0][1], rows[0][0].id) if rows and has_prev else None,
+    }
+
+@bp.route('/')
+def home():
+    return redirect(url_for('main.login'))
+
+@bp.route('/create_admin', methods=['GET', 'POST'])
+def create_admin():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        
+        # Save hashed password in the config or database as needed
+        hashed_password = generate_password_hash(password)
+        # Display success message or save these credentials in config or database
+        print(f"Username: {username}, Password Hash: {hashed_password}")
+        flash("Admin account created! Update config with the above details.", "success")
+        return redirect(url_for('main.login'))
+    
+    return render_template('create_admin.html')
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+
+        # Look the admin up by username and verify the stored hash
+        ensure_default_admin()
+        admin = Admin.query.filter_by(username=username).first()
+        if admin and check_password_hash(admin.password_hash, password):
+            # New session id on login (server-side sessions only)
+            if hasattr(session, 'regenerate'):
+                session.regenerate()
+            session['admin'] = {
+                'username': username
+            }  # Store the admin username in the session
+            return redirect(url_for('main.admin_dashboard'))
+        else:
+            flash("Invalid credentials, please try again.", "error")
+    return render_template('login.html')
+
+@bp.route('/logout')
+def logout():
+    # Clearing deletes the server-side session, in every worker
+    session.clear()
+    return redirect(url_for('main.login'))
+
+@bp.route('/admin_dashboard', methods=['GET', 'POST'])
+def admin_dashboard():
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    admin = session['admin']  # Get the current admin from the session
+
+    if request.method == 'POST':
+        if 'add_employee' in request.form:
+            name = request.form['name']
+            monthly_salary = float(request.form['monthly_salary'])
+            phone_number = request.form['phone_number']
+            id_number = request.form['id_number']
+            start_date = request.form['start_date']
+            address = request.form['address']
+
+            try:
+                # Convert the start date
+                parsed_start_date = parse_date(start_date)
+            except ValueError:
+                flash("Invalid start date format. Please use DD/MM/YYYY.", "danger")
+                return redirect(url_for('main.admin_dashboard'))
+
+            # Create a new employee record
+            new_employee = Employee(
+                name=name,
+                monthly_salary=monthly_salary,
+                phone_number=phone_number,
+                id_number=id_number,
+                start_date=parsed_start_date,
+                address=address,
+                holidays_taken=0  # Initialize holidays taken
+            )
+
+            # Add the new employee to the database
+            db.session.add(new_employee)
+            db.session.commit()
+
+            # Create a directory for the new employee
+            directory = employee_directory(name)
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+            employee_table_changed()
+            flash(f"Employee {name} added successfully and directory created!", "success")
+
+        elif 'update_employee' in request.form:
+            employee_id = int(request.form['employee_id'])
+            new_salary = float(request.form['new_salary'])
+            new_phone_number = request.form.get('new_phone_number')
+            new_address = request.form.get('new_address')
+
+            # Fetch the employee record and update it
+            employee = Employee.query.get(employee_id)
+            if employee:
+                employee.monthly_salary = new_salary
+                if new_phone_number:
+                    employee.phone_number = new_phone_number
+                if new_address:
+                    employee.address = new_address
+                db.session.commit()
+                employee_table_changed()
+                flash(f"Employee {employee.name} updated successfully!", "success")
+            else:
+                flash("Employee not found.", "danger")
+
+        elif 'delete_employee' in request.form:
+            employee_id = int(request.form['employee_id'])
+            # Delete the employee record from the database
+            employee = Employee.query.get(employee_id)
+            if employee:
+                # The document rows go with the employee (cascade); their files
+                # are released like delete_file does
+                files = [stored_files(document) for document in
+                         EmployeeDocument.query.filter_by(employee_id=employee.id)]
+                db.session.delete(employee)
+                db.session.commit()
+                release_stored_files(files)
+                employee_table_changed()
+                flash(f"Employee {employee.name} deleted successfully!", "success")
+            else:
+                flash("Employee not found.", "danger")
+
+        return redirect(url_for('main.admin_dashboard'))
+
+    # This month's and this year's saved payslips, from the incrementally kept
+    # summaries (the employee table itself is on employee_list)
+    now = datetime.now()
+    payroll_totals = payroll_history.month_totals(now.year, now.month)
+    return render_template('admin_dashboard.html', admin=admin,
+                           payroll_totals=payroll_totals, payroll_month=now.strftime('%B %Y'),
+                           payroll_ytd=payroll_history.year_to_date(now.year), payroll_year=now.year)
+
+# Employees with fewer than ?below= days of leave left this year (or ?year=)
+@bp.route('/leave_report')
+def leave_report():
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    year = request.args.get('year', datetime.now().year, type=int)
+    below = request.args.get('below', current_app.config['LEAVE_REPORT_BELOW'], type=int)
+    rows = leave.employees_below(year, below)
+    return render_template('leave_report.html', rows=rows, year=year, below=below)
+
+@bp.route('/import_employees', methods=['POST'])
+def import_employees_upload():
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        flash("Please choose a CSV or XLSX file to import.", "danger")
+        return redirect(url_for('main.admin_dashboard'))
+
+    try:
+        rows = iter_import_rows(file.stream, file.filename)
+        report = import_employees(rows, db.session, Employee,
+                                  batch_size=current_app.config['IMPORT_BATCH_SIZE'])
+    except (ValueError, UnicodeDecodeError) as e:
+        flash(f"Could not read the import file: {e}", "danger")
+        return redirect(url_for('main.admin_dashboard'))
+    if report['imported']:
+        employee_table_changed()
+
+    # API clients get the full per-row report
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(report)
+
+    flash(f"Imported {report['imported']} of {report['rows']} employees.",
+          "success" if not report['errors'] else "danger")
+    for error in report['errors'][:10]:
+        flash(f"Row {error['row']}: {'; '.join(error['errors'])}", "danger")
+    if len(report['errors']) > 10:
+        flash(f"... and {len(report['errors']) - 10} more rows with errors.", "danger")
+    return redirect(url_for('main.admin_dashboard'))
+
+# Columns written by the exports
+EMPLOYEE_EXPORT_COLUMNS = ('id', 'name', 'monthly_salary', 'phone_number', 'id_number',
+                           'start_date', 'address', 'holidays_taken')
+PAYROLL_EXPORT_COLUMNS = ('employee_id', 'name', 'id_number', 'monthly_salary', 'days_absent',
+                          'absence_days_deduction', 'hours_absent', 'absence_hours_deduction',
+                          'extra_days', 'extra_days_pay', 'extra_hours', 'overtime_pay',
+                          'extra_hours_1_5', 'overtime_pay_1_5', 'advanced_payment', 'net_pay')
+PAYROLL_EXPORT_HEADER = ('Employee ID', 'Name', 'ID Number', 'Salary Before', 'Absent Days',
+                         'Absent Days Deduction', 'Absent Hours', 'Absent Hours Deduction',
+                         'Extra Days', 'Extra Days Pay', 'Extra Hours', 'Extra Hours Pay',
+                         'Extra Hours (1.50x)', 'Extra Hours (1.50x) Pay', 'Advanced Payment',
+                         'Salary After')
+
+# Send export rows as a streamed CSV (optionally gzipped) or an XLSX file
+def export_response(header, rows, basename, fmt):
+    if fmt == 'xlsx':
+        return send_file(xlsx_file(header, rows), as_attachment=True,
+                         download_name=f"{basename}.xlsx",
+                         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+    chunks = csv_stream(header, rows)
+    filename = f"{basename}.csv"
+    mimetype = 'text/csv'
+    if request.args.get('gzip') == '1':
+        chunks = gzip_stream(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@bp.route('/export/employees.<any(csv, xlsx):fmt>')
+def export_employees(fmt):
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    columns = [getattr(Employee, name) for name in EMPLOYEE_EXPORT_COLUMNS]
+    query = (db.session.query(*columns)
+             .order_by(Employee.id)
+             .yield_per(current_app.config['EXPORT_CHUNK_SIZE']))
+    # Start dates as DD/MM/YYYY so an export can be imported again
+    start_date = EMPLOYEE_EXPORT_COLUMNS.index('start_date')
+    rows = (row[:start_date] + (format_date(row[start_date]),) + row[start_date + 1:] for row in query)
+    return export_response(EMPLOYEE_EXPORT_COLUMNS, rows, 'employees', fmt)
+
+@bp.route('/export/payroll.<any(csv, xlsx):fmt>')
+def export_payroll(fmt):
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    try:
+        year, month = parse_payroll_month(request.args.get('month'))
+    except ValueError:
+        flash("Invalid month format. Please use MM/YYYY.", "danger")
+        return redirect(url_for('main.admin_dashboard'))
+
+    records = iter_payroll_records(year, month, current_app.config['EXPORT_CHUNK_SIZE'])
+    # Amounts with two decimals, as on the payslips
+    rows = ([payroll_engine.format_money(record[name]) if name in payroll_engine.MONEY_COLUMNS
+             else record[name] for name in PAYROLL_EXPORT_COLUMNS] for record in records)
+    return export_response(PAYROLL_EXPORT_HEADER, rows, f"payroll_{year}_{month:02d}", fmt)
+
+@bp.route('/settings', methods=['GET', 'POST'])
+def settings():
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    ensure_default_admin()
+
+    if request.method == 'POST':
+        if 'add_admin' in request.form:
+            new_admin_username = request.form['username']
+            new_admin_password = request.form['password']
+            admin_picture = request.files['picture']
+
+            if Admin.query.filter_by(username=new_admin_username).first():
+                flash("An admin with that username already exists.", "danger")
+            elif new_admin_username and new_admin_password and allowed_file(
+                    admin_picture.filename):
+                # Create a folder for the new admin
+                admin_folder = os.path.join(current_app.config['UPLOAD_FOLDER'],
+                                            new_admin_username)
+                if not os.path.exists(admin_folder):
+                    os.makedirs(admin_folder)
+
+                # Save the picture in the admin's folder
+                filename = secure_filename(admin_picture.filename)
+                picture_path = os.path.join(admin_folder, filename)
+                admin_picture.save(picture_path)
+
+                new_admin = Admin(username=new_admin_username,
+                                  password_hash=hash_admin_password(new_admin_password),
+                                  picture=picture_path)
+                db.session.add(new_admin)
+                db.session.commit()
+                print(f"New admin added: {new_admin}")  # Debug: Confirm new admin details
+                flash("Admin added successfully!", "success")
+            else:
+                flash(
+                    "Failed to add admin. Ensure all fields are filled and the picture is valid.",
+                    "danger")
+
+        elif 'delete_admin' in request.form:
+            admin_username = request.form['username']
+            admin = Admin.query.filter_by(username=admin_username).first()
+
+            if not admin:
+                flash("Admin not found.", "danger")
+            elif admin_username == session['admin']['username']:
+                flash("You cannot delete the admin you are logged in as.", "danger")
+            else:
+                db.session.delete(admin)
+                db.session.commit()
+                flash("Admin deleted successfully!", "success")
+
+    admins = Admin.query.order_by(Admin.username).all()
+    return render_template('settings.html', admins=admins)
+
+@bp.route('/employee_list')
+def employee_list():
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    # The rendered rows and pager cursors of a page are cached until the
+    # employees change; only a miss queries and renders them
+    def render_rows():
+        page = paginate_employees(request.args)
+        rows = render_template('_employee_rows.html', employees=page.pop('employees'))
+        return {'page': page, 'rows': rows}
+
+    key = {name: request.args.get(name) for name in EMPLOYEE_TABLE_ARGS}
+    fragment = current_app.extensions['fragment_cache'].get_or_render('employee_table', key, render_rows)
+    return render_template('employee_list.html', page=fragment['page'], rows=Markup(fragment['rows']))
+
+@bp.route('/employee_history/<int:employee_id>', methods=['GET', 'POST'])
+def employee_history(employee_id):
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    employee = db.session.get(Employee, employee_id)
+    if not employee:
+        return "Employee not found."
+
+    # Optional DD/MM/YYYY date range on the document date
+    date_from = request.args.get('date_from', '')
+    date_to = request.args.get('date_to', '')
+
+    query = EmployeeDocument.query.filter_by(employee_id=employee.id)
+    if parse_document_date(date_from):
+        query = query.filter(EmployeeDocument.document_date >= parse_document_date(date_from))
+    if parse_document_date(date_to):
+        query = query.filter(EmployeeDocument.document_date <= parse_document_date(date_to))
+    query = query.order_by(EmployeeDocument.document_date.desc(), EmployeeDocument.id.desc())
+
+    documents = query.paginate(per_page=current_app.config['DOCUMENTS_PER_PAGE'], error_out=False)
+
+    # Each entry is (document, file URL, display date)
+    files = []
+    for document in documents.items:
+        file_url = document_url(document)
+        if document.document_date:
+            file_date = document.document_date.strftime('%d/%m/%Y')
+        else:
+            file_date = "Date not available"
+        files.append((document, file_url, file_date))
+
+    return render_template('employee_history.html',
+                           employee=employee,
+                           pdf_files=files,
+                           documents=documents,
+                           date_from=date_from,
+                           date_to=date_to)
+
+# Ranked full-text search over document contents and names, optionally
+# within one employee's documents (?employee_id=)
+@bp.route('/search_documents')
+def search_documents():
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    q = request.args.get('q', '').strip()
+    employee_id = request.args.get('employee_id', type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = current_app.config['SEARCH_RESULTS_PER_PAGE']
+
+    hits = []
+    if q:
+        hits = current_app.extensions['document_index'].search(
+            q, employee_id=employee_id, limit=per_page, offset=(page - 1) * per_page)
+    has_next = len(hits) > per_page
+    hits = hits[:per_page]
+
+    # Index rows whose document was deleted meanwhile are skipped
+    documents = {document.id: document for document in EmployeeDocument.query.filter(
+        EmployeeDocument.id.in_([document_id for document_id, _, _ in hits]))}
+    employees = {employee.id: employee for employee in Employee.query.filter(
+        Employee.id.in_({document.employee_id for document in documents.values()}))}
+    results = [{
+        'document': documents[document_id],
+        'employee': employees.get(documents[document_id].employee_id),
+        'url': document_url(documents[document_id]),
+        'snippet': snippet,
+    } for document_id, _, snippet in hits if document_id in documents]
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'query': q, 'page': page, 'has_next': has_next, 'results': [{
+            'document_id': result['document'].id,
+            'employee_id': result['document'].employee_id,
+            'employee': result['employee'].name if result['employee'] else None,
+            'name': result['document'].original_name,
+            'url': result['url'],
+            'snippet': str(result['snippet']),
+        } for result in results]})
+    return render_template('search_documents.html', q=q, employee_id=employee_id, page=page,
+                           has_next=has_next, results=results)
+
+@bp.route('/thumbnail/<int:document_id>')
+def thumbnail(document_id):
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    document = db.session.get(EmployeeDocument, document_id)
+    if not document:
+        return "Document not found.", 404
+
+    try:
+        path = current_app.extensions['thumbnail_cache'].get(document.sha256, document_path(document),
+                                                             document.mime)
+    except Exception as e:
+        print(f"Error generating thumbnail: {e}")
+        return "Preview not available.", 404
+
+    # Previews are keyed by content, so the hash doubles as a stable ETag
+    return send_file(path, mimetype='image/webp', etag=document.sha256, max_age=86400)
+
+@bp.route('/employee_details/<int:employee_id>', methods=['GET', 'POST'])
+def employee_details(employee_id):
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    employee = db.session.get(Employee, employee_id)
+
+    if not employee:
+        return "Employee not found."
+
+    # Every figure on this page comes from the month's PayrollCalculator, the
+    # same one the payslip PDF uses
+    now = datetime.now()
+    month = now.strftime('%B')
+    calculator = payroll_engine.calculator(now.year, now.month)
+    number_of_days = calculator.number_of_days
+
+    record = payroll_employees(now.year, now.month, [employee.id])[0]
+
+    salary_before = record['monthly_salary']
+    salary_per_day = record['salary_per_day']
+    salary_per_hour = record['salary_per_hour']
+    days_absent = record['days_absent']
+    hours_absent = record['hours_absent']
+    extra_days = record['extra_days']
+    extra_hours = record['extra_hours']
+    extra_hours_1_5 = record['extra_hours_1_5']
+    advanced_payment = record['advanced_payment']
+    leave_allowance = current_app.config['LEAVE_DAYS_PER_YEAR']
+    holidays_taken, leave_allowance = leave.taken_and_allowance(employee.id, now.year, leave_allowance)
+    holidays_value = f"{holidays_taken}/{leave_allowance}"
+    extra_shifts_earnings = record['overtime_pay_1_5']
+    salary_after = record['net_pay']
+
+    if request.method == 'POST':
+        days_absent = int(request.form['days_absent'])
+        hours_absent = int(request.form['hours_absent'])
+        extra_days = int(request.form['extra_days'])
+        extra_hours = int(request.form['extra_hours'])
+        extra_hours_1_5 = int(request.form['extra_hours_1_5'])
+        advanced_payment = float(request.form['advanced_payment'])
+        holidays_taken = int(request.form['holidays_taken'])
+
+        figures = calculator.compute_one(
+            salary_before, days_absent=days_absent,
+            hours_absent=hours_absent, extra_days=extra_days, extra_hours=extra_hours,
+            extra_hours_1_5=extra_hours_1_5, advanced_payment=advanced_payment)
+        salary_after = figures['net_pay']
+
+        entry = get_payroll_entry(employee.id, now.year, now.month)
+        if entry is None:
+            entry = PayrollEntry(employee_id=employee.id, year=now.year, month=now.month)
+            db.session.add(entry)
+        entry.days_absent = days_absent
+        entry.hours_absent = hours_absent
+        entry.extra_days = extra_days
+        entry.extra_hours = extra_hours
+        entry.extra_hours_1_5 = extra_hours_1_5
+        entry.advanced_payment = advanced_payment
+        entry.salary_after = salary_after
+        leave.set_taken(employee, holidays_taken, allowance=leave_allowance,
+                        created_by=session['admin']['username'])
+        payroll_history.record_snapshot(employee, now.year, now.month, figures,
+                                        created_by=session['admin']['username'])
+        db.session.commit()
+
+        return redirect(url_for('main.employee_details', employee_id=employee_id))
+
+    return render_template(
+        'employee_details.html',
+        employee=employee,
+        month=month,
+        number_of_days=number_of_days,
+        salary_before=payroll_engine.format_money(salary_before),
+        salary_per_day=payroll_engine.format_money(salary_per_day),
+        salary_per_hour=payroll_engine.format_money(salary_per_hour),
+        days_absent=days_absent,
+        hours_absent=hours_absent,
+        extra_days=extra_days,
+        extra_hours=extra_hours,
+        extra_hours_1_5=extra_hours_1_5,
+        advanced_payment=payroll_engine.format_money(advanced_payment),
+        holidays_value=holidays_value,
+        holidays_taken=holidays_taken,
+        leave_allowance=leave_allowance,
+        leave_entries=leave.ledger(employee.id, now.year),
+        extra_shifts_earnings=payroll_engine.format_money(extra_shifts_earnings),
+        salary_after=payroll_engine.format_money(salary_after)
+    )
+
+@bp.route('/generate_pdf/<int:employee_id>', methods=['GET'])
+def generate_pdf(employee_id):
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    employee = db.session.get(Employee, employee_id)
+
+    if not employee:
+        return "Employee not found."
+
+    try:
+        try:
+            template_bytes, template_version = template_cache.get()
+        except FileNotFoundError:
+            return "Template file not found."
+
+        now = datetime.now()
+        employee = payroll_employees(now.year, now.month, [employee.id])[0]
+        fields = payslip_fields(employee, now)
+        etag = payslip_cache_key(fields, template_version)
+
+        # The browser already has this exact payslip
+        if etag in request.if_none_match:
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+
+        payslip_cache = current_app.extensions['payslip_cache']
+        pdf = payslip_cache.get(etag)
+        if pdf is None:
+            import fitz  # PyMuPDF, loaded the first time a payslip is rendered
+
+            with fitz.open('pdf', template_bytes) as template:
+                pdf = render_payslip(template, fields)
+            payslip_cache.put(etag, pdf)
+
+        response = send_file(io.BytesIO(pdf), as_attachment=False, download_name=f"{employee['name']}_details.pdf", mimetype='application/pdf')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    except Exception as e:
+        print(f"Error generating PDF: {e}")
+        return "An error occurred while generating the PDF."
+
+# Month-end payslips for every employee, as one ZIP or one merged PDF
+@jobs.handler('payslip_batch')
+def payslip_batch_job(payload):
+    year, month, fmt = payload['year'], payload['month'], payload['format']
+    employees = payroll_employees(year, month)
+    template_bytes, _ = template_cache.get()
+    try:
+        data, stats = generate_batch(employees, fmt=fmt, template_bytes=template_bytes)
+    except ValueError as e:
+        raise jobs.PermanentJobError(str(e))
+
+    print(f"Generated {stats['count']} payslips in {stats['seconds']}s "
+          f"({stats['per_second']} payslips/sec, {stats['workers']} workers)")
+    mimetype = 'application/zip' if fmt == 'zip' else 'application/pdf'
+    return jobs.JobOutput(data, f"payslips_{year}_{month:02d}.{fmt}", mimetype, stats)
+
+# Queue the month-end payslip run and send the browser to its status page
+# (API clients get 202 with the status URL)
+# Queues a whole-company batch, so only a form POST starts one (a link could
+# be followed by prefetchers and crawlers)
+@bp.route('/generate_payslips', methods=['POST'])
+def generate_payslips():
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    fmt = request.form.get('format', 'zip')
+    if fmt not in ('zip', 'pdf'):
+        flash("Unknown payslip format. Use zip or pdf.", "danger")
+        return redirect(url_for('main.admin_dashboard'))
+    try:
+        year, month = parse_payroll_month(request.form.get('month'))
+    except ValueError:
+        flash("Invalid month format. Please use MM/YYYY.", "danger")
+        return redirect(url_for('main.admin_dashboard'))
+
+    job_id = current_app.extensions['job_queue'].submit(
+        'payslip_batch', {'year': year, 'month': month, 'format': fmt},
+        created_by=session['admin']['username'])
+
+    status_url = url_for('main.job_status', job_id=job_id)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(id=job_id, status_url=status_url), 202
+    return redirect(status_url)
+
+@bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    job = db.session.get(Job, job_id)
+    if not job:
+        return "Job not found.", 404
+
+    status = jobs.describe(job)
+    if job.status == 'done' and job.result_path:
+        status['result_url'] = url_for('main.job_result', job_id=job.id)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(status)
+    return render_template('job_status.html', job=status)
+
+@bp.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    job = db.session.get(Job, job_id)
+    if not job or job.status != 'done' or not job.result_path or not os.path.exists(job.result_path):
+        return "Result not available.", 404
+    return send_file(os.path.abspath(job.result_path), as_attachment=True,
+                     download_name=job.result_name, mimetype=job.result_mime)
+
+# Extract a document's text and put it in the search index
+def index_document(document):
+    body = extract_text(document_path(document), document.mime)
+    current_app.extensions['document_index'].index(document.id, document.employee_id,
+                                                   document.original_name, body)
+    return len(body)
+
+# Size change of a compacted document for its job report. An image stripped
+# of EXIF may come out larger, which is reported as added_bytes.
+def compaction_report(original_bytes, size):
+    return {'original_bytes': original_bytes, 'bytes': size,
+            'saved_bytes': max(original_bytes - size, 0), 'added_bytes': max(size - original_bytes, 0)}
+
+# Compact a stored upload (see compaction.py). The smaller copy is stored
+# under its own hash and every document row that shared the old file is
+# pointed at it; the old file is then removed, or kept under originals/.
+# Returns the sizes before and after, or None if the document was already
+# compacted.
+def compact_document(document):
+    if document.original_sha256 is not None:
+        return None
+    old_name, old_sha256, old_size = document.stored_filename, document.sha256, document.size
+
+    if not os.path.exists(document_path(document)):
+        # The same content was uploaded again while an earlier copy was being
+        # compacted and replaced; share the compacted file
+        twin = EmployeeDocument.query.filter(EmployeeDocument.original_sha256 == old_sha256,
+                                             EmployeeDocument.id != document.id).first()
+        if twin is None:
+            raise FileNotFoundError(document_path(document))
+        for name in ('stored_filename', 'sha256', 'size', 'mime', 'original_sha256',
+                     'original_size', 'original_filename'):
+            setattr(document, name, getattr(twin, name))
+        db.session.commit()
+        return compaction_report(old_size, document.size)
+
+    compacted = current_app.extensions['compactor'].compact(document_path(document), document.mime)
+    if compacted is None:
+        document.original_sha256 = old_sha256
+        document.original_size = old_size
+        db.session.commit()
+        return compaction_report(old_size, old_size)
+
+    data, extension, mime = compacted
+    sha256, size, stored_filename, _ = store_bytes(data, extension, INFO_DATABASE_FOLDER)
+    keep = current_app.config['KEEP_ORIGINAL_UPLOADS']
+    original_filename = original_name(old_name) if keep else None
+    for row in EmployeeDocument.query.filter_by(stored_filename=old_name):
+        row.stored_filename = stored_filename
+        row.sha256 = sha256
+        row.size = size
+        row.mime = mime
+        row.original_sha256 = old_sha256
+        row.original_size = old_size
+        row.original_filename = original_filename
+    db.session.commit()
+
+    if keep:
+        keep_original(old_name, INFO_DATABASE_FOLDER)
+    else:
+        os.remove(os.path.join(INFO_DATABASE_FOLDER, old_name))
+    if not EmployeeDocument.query.filter_by(sha256=old_sha256).first():
+        current_app.extensions['thumbnail_cache'].remove(old_sha256)
+    report = compaction_report(old_size, size)
+    kind = 'pdf' if extension == 'pdf' else 'image'
+    # Counters only go up; growth from EXIF stripping is counted separately
+    if report['saved_bytes']:
+        metrics.COMPACTION_SAVED_BYTES.inc(report['saved_bytes'], kind=kind)
+    if report['added_bytes']:
+        metrics.COMPACTION_ADDED_BYTES.inc(report['added_bytes'], kind=kind)
+    return report
+
+# Work after an upload that the admin need not wait for: the file is
+# compacted, its text indexed for search and the preview rendered ahead of
+# the first history page view
+@jobs.handler('process_document')
+def process_document_job(payload):
+    document = db.session.get(EmployeeDocument, payload['document_id'])
+    if document is None:
+        return None
+    compaction = compact_document(document) if current_app.config['COMPACT_UPLOADS'] else None
+    characters = index_document(document)
+    current_app.extensions['thumbnail_cache'].get(document.sha256, document_path(document),
+                                                  document.mime)
+    return jobs.JobOutput(info={'thumbnail': True, 'indexed_characters': characters,
+                                'compaction': compaction})
+
+@bp.route('/upload_file/<int:employee_id>', methods=['POST'])
+def upload_file(employee_id):
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    employee = db.session.get(Employee, employee_id)
+
+    if not employee:
+        flash("Employee not found.", "danger")
+        return redirect(url_for('main.employee_history', employee_id=employee_id))
+
+    if 'file' not in request.files or 'file_date' not in request.form:
+        flash("Please upload a file and enter the date.", "danger")
+        return redirect(url_for('main.employee_history', employee_id=employee_id))
+
+    file = request.files['file']
+    file_date = request.form['file_date']
+
+    if file.filename == '':
+        flash("No selected file", "danger")
+        return redirect(url_for('main.employee_history', employee_id=employee_id))
+
+    document_date = parse_document_date(file_date)
+    if document_date is None:
+        flash("Invalid date format. Please use DD/MM/YYYY.", "danger")
+        return redirect(url_for('main.employee_history', employee_id=employee_id))
+
+    if file and allowed_file(file.filename):
+        extension = file.filename.rsplit('.', 1)[1]
+
+        try:
+            # Streamed to disk in chunks and stored once per content hash
+            sha256, size, stored_filename, created = store_upload(
+                file.stream, extension, INFO_DATABASE_FOLDER, current_app.config['MAX_UPLOAD_BYTES'])
+            metrics.UPLOAD_BYTES.inc(size)
+            metrics.UPLOADS.inc(stored='new' if created else 'duplicate')
+            document = EmployeeDocument(
+                employee_id=employee.id,
+                stored_filename=stored_filename,
+                original_name=secure_filename(file.filename),
+                document_date=document_date,
+                size=size,
+                mime=file.mimetype or mimetypes.guess_type(file.filename)[0],
+                sha256=sha256,
+            )
+            db.session.add(document)
+            db.session.commit()
+            current_app.extensions['job_queue'].submit('process_document', {'document_id': document.id})
+
+            flash(f"File uploaded successfully with date: {file_date}!", "success")
+        except UploadTooLarge as e:
+            flash(str(e), "danger")
+        except Exception as e:
+            flash(f"An error occurred while processing the file: {e}", "danger")
+            print(f"Error: {e}")
+
+        return redirect(url_for('main.employee_history', employee_id=employee_id))
+    else:
+        flash("Invalid file type. Please upload a PDF or image file.", "danger")
+        return redirect(url_for('main.employee_history', employee_id=employee_id))
+
+@bp.route('/delete_file/<int:employee_id>/<int:document_id>', methods=['POST'])
+def delete_file(employee_id, document_id):
+    if 'admin' not in session:
+        return redirect(url_for('main.login'))
+
+    employee = db.session.get(Employee, employee_id)
+
+    if not employee:
+        return "Employee not found."
+
+    document = db.session.get(EmployeeDocument, document_id)
+    if not document or document.employee_id != employee.id:
+        flash("File not found.", "danger")
+        return redirect(url_for('main.employee_history', employee_id=employee_id))
+
+    filename = document.original_name
+    files = [stored_files(document)]
+
+    try:
+        db.session.delete(document)
+        db.session.commit()
+        release_stored_files(files)
+        flash(f"File '{filename}' deleted successfully!", "success")
+    except Exception as e:
+        flash(f"An error occurred while deleting the file: {e}", "danger")
+
+    return redirect(url_for('main.employee_history', employee_id=employee_id))
+
+# Prometheus scrape target (per process; see metrics.Registry)
+@bp.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.app_errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    max_mb = current_app.config['MAX_UPLOAD_BYTES'] // (1024 * 1024)
+    flash(f"File is larger than {max_mb} MB.", "danger")
+    return redirect(request.referrer or url_for('main.admin_dashboard'))
+
+@bp.cli.command('generate-payslips')
+@click.option('--month', help='Payroll month as MM/YYYY (defaults to the current month).')
+@click.option('--format', 'fmt', type=click.Choice(['zip', 'pdf']), default='zip',
+              help='One ZIP of payslips or one merged PDF.')
+@click.option('--workers', type=int, default=None, help='Worker processes (defaults to CPU count).')
+@click.option('--output', type=click.Path(dir_okay=False), default=None, help='Output file.')
+def generate_payslips_command(month, fmt, workers, output):
+    """Generate every employee's payslip for a month."""
+    try:
+        year, month = parse_payroll_month(month)
+    except ValueError:
+        raise click.BadParameter("Use MM/YYYY.", param_hint='--month')
+
+    employees = payroll_employees(year, month)
+    output = output or f"payslips_{year}_{month:02d}.{fmt}"
+
+    with click.progressbar(length=len(employees), label='Generating payslips') as bar:
+        def progress(done, total):
+            bar.update(1)
+
+        try:
+            template_bytes, _ = template_cache.get()
+            payload, stats = generate_batch(employees, fmt=fmt, workers=workers,
+                                            template_bytes=template_bytes, progress=progress)
+        except (ValueError, FileNotFoundError) as e:
+            raise click.ClickException(str(e))
+
+    with open(output, 'wb') as f:
+        f.write(payload)
+
+    click.echo(f"Wrote {stats['count']} payslips to {output} in {stats['seconds']}s "
+               f"({stats['per_second']} payslips/sec, {stats['workers']} workers)")
+
+@bp.cli.command('run-jobs')
+@click.option('--workers', type=int, default=None, help='Worker threads (defaults to JOB_CONCURRENCY).')
+def run_jobs_command(workers):
+    """Work the background job queue until interrupted."""
+    queue = current_app.extensions['job_queue']
+    queue.start(workers=workers, daemon=False)
+    click.echo(f"Working jobs with {workers or queue.concurrency} threads; Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        click.echo("Stopping after the running jobs finish...")
+        queue.stop()
+
+@bp.cli.command('import-employees')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=None, help='Rows per insert batch.')
+def import_employees_command(path, batch_size):
+    """Bulk import employees from a CSV or XLSX file."""
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    started = datetime.now()
+    with open(path, 'rb') as f:
+        try:
+            report = import_employees(iter_import_rows(f, path), db.session, Employee,
+                                      batch_size=batch_size)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    elapsed = (datetime.now() - started).total_seconds()
+    if report['imported']:
+        employee_table_changed()
+
+    for error in report['errors']:
+        click.echo(f"Row {error['row']}: {'; '.join(error['errors'])}", err=True)
+    click.echo(f"Imported {report['imported']} of {report['rows']} rows in {elapsed:.2f}s "
+               f"({len(report['errors'])} rejected).")
+
+@bp.cli.command('build-assets')
+def build_assets_command():
+    """Build resized, fingerprinted AVIF/WebP copies of static/images."""
+    started = datetime.now()
+    manifest = assets.build_assets(current_app.static_folder)
+    elapsed = (datetime.now() - started).total_seconds()
+
+    # Full-width size of each format next to the original
+    for name, entry in manifest.items():
+        sizes = [f"{fmt} {variants[str(entry['width'])]['bytes'] / 1024:.0f} KB"
+                 for fmt, variants in entry['variants'].items()]
+        click.echo(f"{name}: {entry['bytes'] / 1024:.0f} KB -> {', '.join(sizes)}")
+    click.echo(f"Built {len(manifest)} images in {elapsed:.2f}s.")
+
+@bp.cli.command('rebuild-payroll-summaries')
+@click.option('--backfill', is_flag=True,
+              help='First snapshot saved months that have no snapshot yet.')
+def rebuild_payroll_summaries_command(backfill):
+    """Recompute the monthly and yearly payroll summaries from the snapshots."""
+    if backfill:
+        created = payroll_history.backfill_snapshots()
+        click.echo(f"Created {created} snapshots from saved payroll entries.")
+    months = payroll_history.rebuild_summaries()
+    db.session.commit()
+    click.echo(f"Rebuilt summaries for {months} months.")
+
+@bp.cli.command('anniversaries')
+@click.option('--days', default=30, show_default=True, help='How many days ahead to look.')
+def anniversaries_command(days):
+    """List employees whose work anniversary is in the next few days."""
+    upcoming = upcoming_anniversaries(days=days)
+    for employee, anniversary, years in upcoming:
+        click.echo(f"{format_date(anniversary)}  {years:>2} years  {employee.name} ({employee.id_number})")
+    click.echo(f"{len(upcoming)} anniversaries in the next {days} days.")
+
+@bp.cli.command('reindex-documents')
+@click.option('--rebuild', is_flag=True, help='Empty the index first.')
+def reindex_documents_command(rebuild):
+    """Extract the text of every stored document into the search index."""
+    index = current_app.extensions['document_index']
+    if rebuild:
+        index.clear()
+    started = datetime.now()
+    indexed = failed = 0
+    documents = EmployeeDocument.query.order_by(EmployeeDocument.id).all()
+    with click.progressbar(documents, label='Indexing documents') as bar:
+        for document in bar:
+            try:
+                index_document(document)
+                indexed += 1
+            except Exception as e:
+                failed += 1
+                print(f"Error indexing {document.stored_filename}: {e}")
+    index.optimize()
+    elapsed = (datetime.now() - started).total_seconds()
+    click.echo(f"Indexed {indexed} documents in {elapsed:.2f}s ({failed} failed).")
+
+@bp.cli.command('compact-documents')
+def compact_documents_command():
+    """Compact stored documents that have not been compacted yet."""
+    started = datetime.now()
+    compacted = saved = added = 0
+    ids = [document_id for (document_id,) in db.session.query(EmployeeDocument.id)
+           .filter(EmployeeDocument.original_sha256.is_(None)).order_by(EmployeeDocument.id)]
+    for document_id in ids:
+        document = db.session.get(EmployeeDocument, document_id)
+        try:
+            report = compact_document(document)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error compacting {document.stored_filename}: {e}")
+            continue
+        if report is None:
+            continue
+        compacted += 1
+        saved += report['saved_bytes']
+        added += report['added_bytes']
+        click.echo(f"{document.original_name}: {report['original_bytes'] / 1024:.0f} KB -> "
+                   f"{report['bytes'] / 1024:.0f} KB")
+    current_app.extensions['compactor'].shutdown()
+    elapsed = (datetime.now() - started).total_seconds()
+    click.echo(f"Compacted {compacted} documents in {elapsed:.2f}s, saving {saved / 1024 / 1024:.1f} MB"
+               f" ({added / 1024 / 1024:.1f} MB added stripping EXIF from images that grew).")
+
+@bp.cli.command('import-documents')
+def import_documents_command():
+    """Index documents already sitting in employee folders."""
+    imported = 0
+    for employee in Employee.query.order_by(Employee.id).all():
+        file_directory = employee_directory(employee.name)
+        if not os.path.isdir(file_directory):
+            continue
+
+        known = {name for (name,) in db.session.query(EmployeeDocument.stored_filename)
+                 .filter_by(employee_id=employee.id)}
+        for f in sorted(os.listdir(file_directory)):
+            file_path = os.path.join(file_directory, f)
+            stored_filename = os.path.relpath(file_path, INFO_DATABASE_FOLDER)
+            if stored_filename in known or not allowed_file(f) or not os.path.isfile(file_path):
+                continue
+
+            # Dates used to be kept in a '<file>_date.txt' next to the document
+            document_date = None
+            date_file_path = os.path.join(file_directory, f"{f}_date.txt")
+            if os.path.exists(date_file_path):
+                with open(date_file_path, 'r') as date_file:
+                    document_date = parse_document_date(date_file.read())
+
+            sha256, size = file_digest(file_path)
+            db.session.add(EmployeeDocument(
+                employee_id=employee.id,
+                stored_filename=stored_filename,
+                original_name=f,
+                document_date=document_date,
+                size=size,
+                mime=mimetypes.guess_type(f)[0],
+                sha256=sha256,
+                uploaded_at=datetime.fromtimestamp(os.path.getmtime(file_path)),
+            ))
+            imported += 1
+        db.session.commit()
+
+    click.echo(f"Imported {imported} documents.")